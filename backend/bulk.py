@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+
+class BulkResult:
+    """Running totals for a bulk job, shared with its progress callback."""
+
+    __slots__ = ("total", "changed", "skipped", "failed", "started", "finished")
+
+    def __init__(self, total):
+        self.total = total
+        self.changed = 0
+        self.skipped = 0
+        self.failed = []  # (item, exception)
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.changed + self.skipped + len(self.failed)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self):
+        """Items handled per second so far."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds left at the current rate, or None before anything is done."""
+        rate = self.rate
+        return (self.total - self.done) / rate if rate else None
+
+
+async def run_bulk(items, worker, *, concurrency=10, progress=None, interval=1.5, result=None):
+    """Run `worker(item)` over `items` with at most `concurrency` calls in flight.
+
+    `worker` returns True when it changed something and False when the item
+    was already in the wanted state. Exceptions are collected in
+    `result.failed` instead of stopping the job. `progress(result)` is awaited
+    at most once every `interval` seconds and once more at the end. Pass
+    your own `result` to keep reading the counters if the job is cancelled.
+    """
+    items = list(items)
+    if result is None:
+        result = BulkResult(len(items))
+    pending = iter(items)
+
+    async def consume():
+        for item in pending:
+            try:
+                if await worker(item):
+                    result.changed += 1
+                else:
+                    result.skipped += 1
+            except Exception as e:
+                result.failed.append((item, e))
+
+    async def report():
+        while True:
+            await asyncio.sleep(interval)
+            await _report(progress, result)
+
+    reporter = asyncio.create_task(report()) if progress is not None and items else None
+    try:
+        await asyncio.gather(*(consume() for _ in range(min(concurrency, len(items)))))
+    finally:
+        result.finished = time.monotonic()
+        if reporter is not None:
+            reporter.cancel()
+    if progress is not None:
+        await _report(progress, result)
+    return result
+
+
+async def _report(progress, result):
+    try:
+        await progress(result)
+    except Exception as e:
+        logging.error(f"Bulk job progress update failed: {e}")
+
+
+def edit_overwrite(target, reason=None, **permissions):
+    """Return a `run_bulk` worker that sets `permissions` for `target` on each channel.
+
+    Other values in the existing overwrite are kept, and channels that
+    already have the wanted values are skipped without an API call.
+    """
+    async def worker(channel):
+        current = channel.overwrites_for(target)
+        wanted = discord.PermissionOverwrite(**dict(current))
+        wanted.update(**permissions)
+        if wanted == current:
+            return False
+        await channel.set_permissions(target, overwrite=None if wanted.is_empty() else wanted, reason=reason)
+        return True
+    return worker
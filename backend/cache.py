@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """Coalesce concurrent loads for the same key into one in-flight call."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, key):
+        return key in self._pending
+
+    async def do(self, key, factory):
+        """Await `factory()` for `key`, sharing the result with concurrent callers."""
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._pending[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # Shield so one cancelled waiter does not cancel the load for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+
+class PrefixCache:
+    """Per-guild command prefixes held in memory.
+
+    The cache is warmed in bulk at startup. Once warm, a guild without a row
+    simply uses the default prefix, so the database is only touched when the
+    prefix commands change something or when warming failed.
+    """
+
+    def __init__(self, default="!"):
+        self.default = default
+        self._prefixes = {}
+        self._complete = False
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def warm(self, rows):
+        """Replace the cache with `(guild_id, prefix)` rows covering every guild."""
+        self._prefixes = {int(guild_id): prefix for guild_id, prefix in rows}
+        self._complete = True
+        logging.info(f"Prefix cache warmed with {len(self._prefixes)} custom prefixes")
+
+    async def get(self, guild_id, fetch):
+        """Return the prefix for `guild_id`, calling `fetch(guild_id)` only on a cold miss."""
+        if guild_id is None:
+            return self.default
+        prefix = self._prefixes.get(guild_id)
+        if prefix is not None or self._complete:
+            self.hits += 1
+            return prefix or self.default
+        self.misses += 1
+        prefix = await self._flight.do(guild_id, lambda: fetch(guild_id))
+        self._prefixes[guild_id] = prefix or self.default
+        return prefix or self.default
+
+    def set(self, guild_id, prefix):
+        self._prefixes[guild_id] = prefix
+
+    def delete(self, guild_id):
+        if self._complete:
+            self._prefixes.pop(guild_id, None)
+        else:
+            self._prefixes[guild_id] = self.default
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._prefixes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "in_flight": len(self._flight),
+        }
+
+
+class GuildConfig:
+    """Moderation settings for one guild: jail setup, mute role and channel message limits."""
+
+    __slots__ = (
+        "guild_id", "jail_channel_id", "jail_role_id", "jail_log_channel_id", "jail_provisioned", "mute_role_id", "message_limits"
+    )
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.jail_channel_id = None
+        self.jail_role_id = None
+        self.jail_log_channel_id = None
+        self.jail_provisioned = False
+        self.mute_role_id = None
+        self.message_limits = {}  # channel_id: MessageLimit
+
+    @property
+    def jail_configured(self):
+        return self.jail_role_id is not None
+
+    def set_jail(self, setup):
+        self.jail_channel_id = setup.channel_id
+        self.jail_role_id = setup.role_id
+        self.jail_log_channel_id = setup.log_channel_id
+        self.jail_provisioned = bool(setup.provisioned)
+
+    def clear_jail(self):
+        self.jail_channel_id = self.jail_role_id = self.jail_log_channel_id = None
+        self.jail_provisioned = False
+
+
+class GuildConfigCache:
+    """Per-guild `GuildConfig` objects, loaded in bulk at startup and updated on every write.
+
+    Commands update the cached object right after their database write, so
+    once warm the cache never needs to query on a read.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._complete = False
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._configs)
+
+    def warm(self, jail_setups, mute_roles, message_limits):
+        """Build every guild's config from full table scans of the three settings tables."""
+        configs = {}
+        for setup in jail_setups:
+            self._entry(configs, setup.guild_id).set_jail(setup)
+        for guild_id, role_id in mute_roles:
+            self._entry(configs, guild_id).mute_role_id = role_id
+        for limit in message_limits:
+            self._entry(configs, limit.guild_id).message_limits[limit.channel_id] = limit
+        self._configs = configs
+        self._complete = True
+        logging.info(f"Guild config cache warmed with {len(configs)} configured guilds")
+
+    @staticmethod
+    def _entry(configs, guild_id):
+        config = configs.get(guild_id)
+        if config is None:
+            config = configs[guild_id] = GuildConfig(guild_id)
+        return config
+
+    def cached(self, guild_id):
+        """Return the config for `guild_id` without loading, creating an empty one once warm."""
+        config = self._configs.get(guild_id)
+        if config is None and self._complete:
+            config = self._entry(self._configs, guild_id)
+        return config
+
+    async def get(self, guild_id, fetch):
+        """Return the config for `guild_id`, calling `fetch(guild_id)` only on a cold miss."""
+        config = self.cached(guild_id)
+        if config is not None:
+            self.hits += 1
+            return config
+        self.misses += 1
+        config = await self._flight.do(guild_id, lambda: fetch(guild_id))
+        return self._configs.setdefault(guild_id, config)
+
+    def put(self, guild_id, config):
+        """Replace the cached config, e.g. after another cluster changed it."""
+        self._configs[guild_id] = config
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._configs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class TTLCache:
+    """Least recently used cache whose entries also expire `ttl` seconds after they were stored.
+
+    `get_or_load` shares one in-flight load between concurrent callers for
+    the same key, and failed loads are not cached.
+    """
+
+    def __init__(self, *, max_entries=512, ttl=600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key: (expires_at, value), least recently used first
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expired += 1
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key, fetch):
+        """Return the value for `key`, awaiting `fetch()` once for all concurrent misses."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        if key in self._flight:
+            self.coalesced += 1
+        value = await self._flight.do(key, fetch)
+        self.put(key, value)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
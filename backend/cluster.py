@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+
+import aiohttp
+
+from backend.ipc import IPCServer
+from backend.profiles import format_memory
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5.0  # Discord allows max_concurrency identifies per 5 seconds
+
+
+def shard_ranges(shard_count, clusters):
+    """Split shards 0..shard_count-1 into `clusters` contiguous ranges of near-equal size."""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for cluster_id in range(clusters):
+        end = start + size + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def recommended_shards(token):
+    """Return Discord's recommended shard count and identify concurrency for this token."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def run_cluster(cluster_id, shard_ids, shard_count, ipc_port):
+    """Worker process entry point: run one DiscordBot for `shard_ids`."""
+    from bot import DiscordBot, intents
+
+    bot = DiscordBot(intents=intents, cluster_id=cluster_id, shard_ids=shard_ids, shard_count=shard_count, ipc_port=ipc_port)
+    bot.run(os.getenv("TOKEN"))
+
+
+class Cluster:
+    __slots__ = ("id", "shard_ids", "process", "restarts", "started_at")
+
+    def __init__(self, cluster_id, shard_ids):
+        self.id = cluster_id
+        self.shard_ids = shard_ids
+        self.process = None
+        self.restarts = 0
+        self.started_at = None
+
+
+class ClusterLauncher:
+    """Runs the bot as several worker processes, each owning a contiguous range of shards.
+
+    The launcher applies migrations once, starts the clusters with their
+    identifies staggered to Discord's concurrency limit, hosts the IPC hub
+    they use to stay in sync, restarts clusters whose process dies and
+    logs a warning for any cluster that stops reporting health.
+    """
+
+    def __init__(self, clusters, *, shard_count=None, health_interval=15.0):
+        self.cluster_count = clusters
+        self.shard_count = shard_count
+        self.health_interval = health_interval
+        self.clusters = []
+        self.ipc = IPCServer()
+        self._context = multiprocessing.get_context("spawn")
+
+    async def run(self):
+        max_concurrency = 1
+        if self.shard_count is None:
+            self.shard_count, max_concurrency = await recommended_shards(os.getenv("TOKEN"))
+        await self.migrate()
+        await self.ipc.start()
+
+        ranges = shard_ranges(self.shard_count, self.cluster_count)
+        logging.info(f"Launching {len(ranges)} clusters for {self.shard_count} shards")
+        for cluster_id, shard_ids in enumerate(ranges):
+            cluster = Cluster(cluster_id, shard_ids)
+            self.clusters.append(cluster)
+            self.spawn(cluster)
+            await asyncio.sleep(IDENTIFY_INTERVAL * math.ceil(len(shard_ids) / max_concurrency))
+
+        while True:
+            await asyncio.sleep(self.health_interval)
+            self.check()
+
+    async def migrate(self):
+        """Apply migrations here so clusters starting together never race on them."""
+        from database import DatabasePool, migrate
+
+        pool = DatabasePool()
+        await pool.open()
+        try:
+            await migrate(pool)
+        finally:
+            await pool.close()
+
+    def spawn(self, cluster):
+        cluster.process = self._context.Process(
+            target=run_cluster, args=(cluster.id, cluster.shard_ids, self.shard_count, self.ipc.port), name=f"cluster-{cluster.id}"
+        )
+        cluster.process.start()
+        cluster.started_at = time.time()
+        logging.info(f"Started cluster {cluster.id} (shards {cluster.shard_ids[0]}-{cluster.shard_ids[-1]}, pid {cluster.process.pid})")
+
+    def check(self):
+        now = time.time()
+        for cluster in self.clusters:
+            if not cluster.process.is_alive():
+                cluster.restarts += 1
+                logging.error(f"Cluster {cluster.id} exited with code {cluster.process.exitcode}; restart #{cluster.restarts}")
+                self.ipc.health.pop(cluster.id, None)
+                self.spawn(cluster)
+                continue
+            report = self.ipc.health.get(cluster.id)
+            last_seen = report["received_at"] if report else cluster.started_at
+            if now - last_seen > self.health_interval * 3:
+                logging.warning(f"Cluster {cluster.id} has not reported health for {now - last_seen:.0f}s")
+            elif report:
+                latencies = [latency for latency in report["shards"].values() if latency is not None]
+                worst = f"{max(latencies)}ms" if latencies else "n/a"
+                logging.info(
+                    f"Cluster {cluster.id}: {'ready' if report['ready'] else 'starting'}, {report['guilds']} guilds, "
+                    f"worst shard latency {worst}, {format_memory(report['memory_mb'])}"
+                )
+
+    def stop(self):
+        for cluster in self.clusters:
+            if cluster.process is not None and cluster.process.is_alive():
+                cluster.process.terminate()
+        for cluster in self.clusters:
+            if cluster.process is not None:
+                cluster.process.join(timeout=10)
+
+
+def launch(clusters, shard_count=None):
+    """Run `clusters` worker processes until interrupted."""
+    launcher = ClusterLauncher(clusters, shard_count=shard_count)
+    try:
+        asyncio.run(launcher.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        launcher.stop()
@@ -0,0 +1,87 @@
+import logging
+import time
+
+import discord
+
+
+class HandlerStats:
+    __slots__ = ("calls", "failures", "total_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.total_ms = 0.0
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class ComponentRouter:
+    """Routes button and select interactions to one handler per component type.
+
+    Components carry all of their state in a custom_id of the form
+    `prefix:arg:arg...`, and handlers are looked up by prefix when the click
+    arrives. Nothing is kept per message, so open menus cost no memory and
+    keep working after a restart, and a cog that reloads simply registers
+    its handlers again.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self.handler_stats = {}  # prefix: HandlerStats
+        self.unrouted = 0
+
+    def register(self, prefix, handler):
+        """Send clicks on components whose custom_id starts with `prefix:` to `await handler(interaction, args)`."""
+        self._handlers[prefix] = handler
+
+    def unregister(self, prefix):
+        self._handlers.pop(prefix, None)
+
+    @staticmethod
+    def custom_id(prefix, *args):
+        custom_id = ":".join(str(part) for part in (prefix, *args))
+        if len(custom_id) > 100:
+            raise ValueError(f"custom_id is longer than 100 characters: {custom_id}")
+        return custom_id
+
+    @staticmethod
+    def detach(view):
+        """Stop `view` so discord.py does not keep it in memory; its clicks are routed by custom_id instead."""
+        view.stop()
+        return view
+
+    async def dispatch(self, interaction):
+        """Route a component interaction. Returns False if no handler owns its custom_id."""
+        if interaction.type != discord.InteractionType.component:
+            return False
+        prefix, *args = interaction.data.get("custom_id", "").split(":")
+        handler = self._handlers.get(prefix)
+        if handler is None:
+            self.unrouted += 1
+            return False
+
+        stats = self.handler_stats.get(prefix)
+        if stats is None:
+            stats = self.handler_stats[prefix] = HandlerStats()
+        started = time.perf_counter()
+        try:
+            await handler(interaction, args)
+        except Exception as e:
+            stats.failures += 1
+            logging.error(f"Component handler '{prefix}' failed: {e}", exc_info=True)
+            if not interaction.response.is_done():
+                await interaction.response.send_message("Something went wrong with this menu.", ephemeral=True)
+        finally:
+            stats.calls += 1
+            stats.total_ms += (time.perf_counter() - started) * 1000
+        return True
+
+    def stats(self):
+        return {
+            "handlers": len(self._handlers),
+            "calls": sum(stats.calls for stats in self.handler_stats.values()),
+            "failures": sum(stats.failures for stats in self.handler_stats.values()),
+            "unrouted": self.unrouted,
+        }
@@ -0,0 +1,154 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+
+from backend.cache import SingleFlight
+
+
+class Priority(enum.IntEnum):
+    CRITICAL = 0  # Bans, lockdowns, jails: never queued
+    NORMAL = 1
+    COSMETIC = 2  # Help menus, "command not found", restart notices: served last
+
+
+class RouteStats:
+    __slots__ = ("calls", "queued", "in_flight", "coalesced", "shed", "failed", "wait_ms", "max_wait_ms", "total_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.coalesced = 0
+        self.shed = 0
+        self.failed = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_ms = 0.0
+
+    @property
+    def avg_wait_ms(self):
+        return self.wait_ms / self.calls if self.calls else 0.0
+
+
+class RestDispatcher:
+    """Priority lanes for outgoing REST calls.
+
+    Critical calls go straight to discord.py. Normal and cosmetic calls share
+    `concurrency` slots, handed out in priority order, so a queue of help
+    embeds can never hold up a lockdown. Cosmetic calls submitted with
+    `shed=True` are dropped while critical work is running in the same guild
+    or the queue is `shed_depth` deep; the rest wait their turn in the
+    cosmetic lane. Calls submitted with the same `key` while one is pending
+    share its result.
+    """
+
+    def __init__(self, *, concurrency: int = 8, shed_depth: int = 20):
+        self.concurrency = concurrency
+        self.shed_depth = shed_depth
+        self.routes = {}  # route name: RouteStats
+        self._active = 0
+        self._queued = 0
+        self._critical = {}  # guild id: critical calls in flight
+        self._waiters = []  # (priority, seq, future); cancelled futures are skipped lazily
+        self._seq = itertools.count()
+        self._flight = SingleFlight()
+
+    def saturated(self, guild_id=None):
+        """Whether `guild_id` has critical calls in flight or the shared queue is `shed_depth` deep."""
+        return self._critical.get(guild_id, 0) > 0 or self._queued >= self.shed_depth
+
+    async def submit(self, route: str, factory, *, priority: Priority = Priority.NORMAL, key=None, guild_id=None, shed=False):
+        """Await `factory()` in the lane for `priority`, on behalf of `guild_id`.
+
+        Returns None if a cosmetic call submitted with `shed=True` was dropped;
+        only pass that for messages nobody asked for.
+        """
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        if key is None:
+            return await self._run(stats, factory, priority, guild_id, shed)
+        if (route, key) in self._flight:
+            stats.coalesced += 1
+        return await self._flight.do((route, key), lambda: self._run(stats, factory, priority, guild_id, shed))
+
+    async def send(self, destination, *, route: str = "send_message", priority: Priority = Priority.NORMAL, key=None, guild_id=None, shed=False, **kwargs):
+        """`destination.send(**kwargs)` through the dispatcher."""
+        return await self.submit(route, lambda: destination.send(**kwargs), priority=priority, key=key, guild_id=guild_id, shed=shed)
+
+    async def _run(self, stats, factory, priority, guild_id, shed):
+        if priority == Priority.CRITICAL:
+            self._critical[guild_id] = self._critical.get(guild_id, 0) + 1
+            try:
+                return await self._call(stats, factory, time.perf_counter())
+            finally:
+                self._critical[guild_id] -= 1
+                if not self._critical[guild_id]:
+                    del self._critical[guild_id]
+
+        if priority == Priority.COSMETIC and shed and self.saturated(guild_id):
+            stats.shed += 1
+            return None
+        queued_at = time.perf_counter()
+        stats.queued += 1
+        self._queued += 1
+        try:
+            await self._acquire(priority)
+        finally:
+            stats.queued -= 1
+            self._queued -= 1
+        try:
+            return await self._call(stats, factory, queued_at)
+        finally:
+            self._release()
+
+    async def _call(self, stats, factory, queued_at):
+        started = time.perf_counter()
+        wait_ms = (started - queued_at) * 1000
+        stats.calls += 1
+        stats.wait_ms += wait_ms
+        stats.max_wait_ms = max(stats.max_wait_ms, wait_ms)
+        stats.in_flight += 1
+        try:
+            return await factory()
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_ms += (time.perf_counter() - started) * 1000
+
+    async def _acquire(self, priority):
+        # Free slots are always handed to live waiters first, so any left in the heap are cancelled
+        if self._active < self.concurrency:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation landed
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)  # Hand the slot straight to the next waiter
+                return
+        self._active -= 1
+
+    def stats(self):
+        return {
+            "in_flight": self._active,
+            "concurrency": self.concurrency,
+            "queued": self._queued,
+            "critical": sum(self._critical.values()),
+            "shed": sum(stats.shed for stats in self.routes.values()),
+            "coalesced": sum(stats.coalesced for stats in self.routes.values()),
+        }
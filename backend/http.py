@@ -0,0 +1,128 @@
+import tempfile
+
+import aiohttp
+
+
+class DownloadTooLarge(Exception):
+    """Raised when a download would exceed its `max_bytes`."""
+
+    def __init__(self, size, max_bytes):
+        super().__init__(f"Download is larger than {max_bytes} bytes")
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+class HttpClient:
+    """The bot's one aiohttp session for outbound HTTP that is not Discord's API.
+
+    The connector keeps connections alive and caches DNS lookups, so
+    repeated downloads from the same CDN skip DNS, TCP and TLS setup. Every
+    request gets the default timeouts unless it passes its own `timeout` in
+    seconds, and trace hooks count how often connections are reused.
+    """
+
+    def __init__(self, *, limit=100, limit_per_host=10, keepalive=30.0, dns_ttl=300, timeout=30.0, connect_timeout=5.0, read_timeout=15.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.dns_ttl = dns_ttl
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout, sock_read=read_timeout)
+        self.session = None
+        self.requests = 0
+        self.failures = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+        self.downloaded_bytes = 0
+
+    async def start(self):
+        """Create the session; must run inside the bot's event loop."""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit, limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive, ttl_dns_cache=self.dns_ttl,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trace_configs=[self._trace()])
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def request(self, method, url, *, timeout=None, **kwargs):
+        """`session.request`, with `timeout` in seconds overriding the total timeout for this call."""
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout, connect=self.timeout.connect, sock_read=self.timeout.sock_read)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    async def download(self, url, *, max_bytes, spool_bytes=8 * 1024 * 1024, chunk_size=64 * 1024, timeout=None):
+        """Stream `url` into a new SpooledTemporaryFile, rewound and ready to read.
+
+        The file stays in memory up to `spool_bytes` and moves to an anonymous
+        temporary file after that, so concurrent downloads never share a path.
+        Raises DownloadTooLarge as soon as the body passes `max_bytes`; the
+        caller owns the returned file and must close it.
+        """
+        async with self.get(url, timeout=timeout) as response:
+            response.raise_for_status()
+            if response.content_length is not None and response.content_length > max_bytes:
+                raise DownloadTooLarge(response.content_length, max_bytes)
+            buffer = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+            try:
+                size = 0
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise DownloadTooLarge(size, max_bytes)
+                    buffer.write(chunk)
+            except BaseException:
+                buffer.close()
+                raise
+        self.downloaded_bytes += size
+        buffer.seek(0)
+        return buffer
+
+    def _trace(self):
+        trace = aiohttp.TraceConfig()
+
+        async def request_start(session, context, params):
+            self.requests += 1
+
+        async def request_exception(session, context, params):
+            self.failures += 1
+
+        async def connection_created(session, context, params):
+            self.new_connections += 1
+
+        async def connection_reused(session, context, params):
+            self.reused_connections += 1
+
+        async def dns_hit(session, context, params):
+            self.dns_hits += 1
+
+        async def dns_miss(session, context, params):
+            self.dns_misses += 1
+
+        trace.on_request_start.append(request_start)
+        trace.on_request_exception.append(request_exception)
+        trace.on_connection_create_end.append(connection_created)
+        trace.on_connection_reuseconn.append(connection_reused)
+        trace.on_dns_cache_hit.append(dns_hit)
+        trace.on_dns_cache_miss.append(dns_miss)
+        return trace
+
+    def stats(self):
+        connections = self.new_connections + self.reused_connections
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_rate": self.reused_connections / connections if connections else 0.0,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+            "downloaded_bytes": self.downloaded_bytes,
+        }
@@ -0,0 +1,181 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+
+
+def _send(writer, message):
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+class IPCServer:
+    """The launcher's end of the cluster channel, listening on localhost.
+
+    Every cluster keeps one connection open and speaks newline-delimited
+    JSON. `publish` messages are relayed to every other cluster, `health`
+    reports are kept as the latest report per cluster, and a `request` for
+    health is answered with a `reply` carrying the same nonce.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.clients = {}  # cluster_id: StreamWriter
+        self.health = {}  # cluster_id: latest report, with the time it arrived
+        self.relayed = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"Cluster IPC listening on {self.host}:{self.port}")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in self.clients.values():
+            writer.close()
+
+    async def _serve(self, reader, writer):
+        cluster_id = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "hello":
+                    cluster_id = message["cluster"]
+                    self.clients[cluster_id] = writer
+                elif op == "publish":
+                    for other_id, other in self.clients.items():
+                        if other_id != cluster_id:
+                            _send(other, message)
+                            self.relayed += 1
+                elif op == "health":
+                    self.health[cluster_id] = dict(message["data"], received_at=time.time())
+                elif op == "request" and message.get("what") == "health":
+                    _send(writer, {"op": "reply", "nonce": message["nonce"], "data": self.health})
+        except (ConnectionError, ValueError) as e:
+            logging.error(f"Cluster {cluster_id} IPC connection failed: {e}")
+        finally:
+            if self.clients.get(cluster_id) is writer:
+                del self.clients[cluster_id]
+            writer.close()
+
+
+class IPCClient:
+    """A cluster's connection to the launcher, reconnecting whenever it drops.
+
+    Handlers registered with `on(event, handler)` receive what other
+    clusters `publish`, and `health()` is reported every `interval` seconds.
+    """
+
+    def __init__(self, cluster_id, port, *, host="127.0.0.1", health=None, interval=15.0):
+        self.cluster_id = cluster_id
+        self.host = host
+        self.port = port
+        self.health = health
+        self.interval = interval
+        self.handlers = {}
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self._writer = None
+        self._replies = {}  # nonce: future
+        self._nonces = itertools.count()
+        self._tasks = []
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def on(self, event, handler):
+        """Call `await handler(data)` whenever another cluster publishes `event`."""
+        self.handlers[event] = handler
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._run(), name="ipc-reader")]
+        if self.health is not None:
+            self._tasks.append(asyncio.create_task(self._report(), name="ipc-health"))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._writer is not None:
+            self._writer.close()
+
+    def publish(self, event, data):
+        """Send `data` to every other cluster. Returns False while disconnected."""
+        if self._writer is None:
+            return False
+        _send(self._writer, {"op": "publish", "event": event, "data": data})
+        self.published += 1
+        return True
+
+    async def request(self, what, timeout=5.0):
+        """Ask the launcher for `what` (currently only `health`) and wait for the reply."""
+        if self._writer is None:
+            raise ConnectionError("Not connected to the cluster launcher")
+        nonce = next(self._nonces)
+        future = self._replies[nonce] = asyncio.get_running_loop().create_future()
+        try:
+            _send(self._writer, {"op": "request", "what": what, "nonce": nonce})
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._replies.pop(nonce, None)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                logging.error(f"Could not reach the cluster launcher on port {self.port}: {e}")
+                await asyncio.sleep(5)
+                continue
+            self._writer = writer
+            _send(writer, {"op": "hello", "cluster": self.cluster_id})
+            try:
+                async for line in reader:
+                    await self._receive(json.loads(line))
+            except (ConnectionError, ValueError) as e:
+                logging.error(f"Cluster IPC connection lost: {e}")
+            finally:
+                self._writer = None
+                writer.close()
+            self.reconnects += 1
+            await asyncio.sleep(1)
+
+    async def _receive(self, message):
+        op = message.get("op")
+        if op == "reply":
+            future = self._replies.get(message["nonce"])
+            if future is not None and not future.done():
+                future.set_result(message["data"])
+        elif op == "publish":
+            self.received += 1
+            handler = self.handlers.get(message["event"])
+            if handler is None:
+                return
+            try:
+                await handler(message["data"])
+            except Exception as e:
+                logging.error(f"IPC handler for '{message['event']}' failed: {e}", exc_info=True)
+
+    async def _report(self):
+        while True:
+            if self._writer is not None:
+                try:
+                    _send(self._writer, {"op": "health", "data": self.health()})
+                except Exception as e:
+                    logging.error(f"Failed to report cluster health: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import uuid
+from collections import OrderedDict
+
+from backend.cache import SingleFlight
+
+_SAFE_KEY = re.compile(r"[\w.-]+")
+
+
+class MediaCache:
+    """Downloaded media on disk, capped at `max_bytes` by evicting the least recently used files.
+
+    Each process needs its own directory. Files are written under a temporary
+    name and renamed into place, so a half-written file is never served, and
+    concurrent misses for the same key share one download.
+    """
+
+    def __init__(self, directory, *, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files = OrderedDict()  # key: size in bytes, least recently used first
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._files)
+
+    def load(self):
+        """Blocking: index what an earlier run left in the directory, oldest first, and trim it to size."""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if ".tmp-" in entry.name:
+                os.remove(entry.path)  # Left over from a write that never finished
+                continue
+            stat = entry.stat()
+            found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, key, size in sorted(found):
+            self._files[key] = size
+            self.total_bytes += size
+        self._evict()
+        logging.info(f"Media cache loaded {len(self._files)} files ({self.total_bytes / 1048576:.1f} MiB) from {self.directory}")
+
+    def path(self, key):
+        if not _SAFE_KEY.fullmatch(key):
+            raise ValueError(f"Unsafe media cache key: {key!r}")
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Return `(path, size)` for a cached file, or None. Open the path before the next await."""
+        size = self._files.get(key)
+        if size is None or not os.path.exists(self.path(key)):
+            if size is not None:
+                self._forget(key)
+            self.misses += 1
+            return None
+        self._files.move_to_end(key)
+        self.hits += 1
+        return self.path(key), size
+
+    async def put(self, key, fileobj):
+        """Copy `fileobj` into the cache as `key` and return `(path, size)`."""
+        path = self.path(key)
+        size = await asyncio.to_thread(self._write, path, fileobj)
+        if key in self._files:
+            self._forget(key)
+        self._files[key] = size
+        self.total_bytes += size
+        self._evict(keep=key)
+        return path, size
+
+    @staticmethod
+    def _write(path, fileobj):
+        temporary = f"{path}.tmp-{uuid.uuid4().hex}"
+        try:
+            with open(temporary, "wb") as target:
+                shutil.copyfileobj(fileobj, target, 1024 * 1024)
+                size = target.tell()
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return size
+
+    async def get_or_fetch(self, key, fetch, *, variant=None):
+        """Return `(path, size)` for `key`, awaiting `fetch()` for a file object on a miss.
+
+        Concurrent misses with the same `key` and `variant` share one fetch.
+        The file object returned by `fetch` is closed once it has been copied.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        if (key, variant) in self._flight:
+            self.coalesced += 1
+        return await self._flight.do((key, variant), lambda: self._fetch(key, fetch))
+
+    async def _fetch(self, key, fetch):
+        fileobj = await fetch()
+        with fileobj:
+            return await self.put(key, fileobj)
+
+    def _forget(self, key):
+        self.total_bytes -= self._files.pop(key)
+
+    def _evict(self, keep=None):
+        for key in list(self._files):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._forget(key)
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except OSError as e:
+                logging.error(f"Failed to evict {key} from the media cache: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
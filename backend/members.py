@@ -0,0 +1,310 @@
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+from backend.cache import SingleFlight
+
+
+class GuildStats:
+    """Member counts for one guild, kept current from member events."""
+
+    __slots__ = ("humans", "bots", "boosters")
+
+    def __init__(self):
+        self.humans = 0
+        self.bots = 0
+        self.boosters = 0
+
+    def add(self, member, sign=1):
+        if member.bot:
+            self.bots += sign
+        else:
+            self.humans += sign
+        if member.premium_since is not None:
+            self.boosters += sign
+
+    def remove(self, member):
+        self.add(member, -1)
+
+    @classmethod
+    def from_members(cls, members):
+        stats = cls()
+        for member in members:
+            stats.add(member)
+        return stats
+
+    def update(self, before, after):
+        if (before.premium_since is None) != (after.premium_since is None):
+            self.boosters += 1 if after.premium_since is not None else -1
+
+
+class GuildStatsCache:
+    """Per-guild `GuildStats`, built from the member cache on first use.
+
+    After the first build, join, leave and update events keep the counts
+    current, so reading them never walks the member list again.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self.builds = 0
+
+    def __len__(self):
+        return len(self._stats)
+
+    def get(self, guild):
+        """Return the stats for a chunked `guild`, building them on the first call."""
+        stats = self._stats.get(guild.id)
+        if stats is None:
+            stats = self._stats[guild.id] = GuildStats()
+            for member in guild.members:
+                stats.add(member)
+            self.builds += 1
+        return stats
+
+    def member_join(self, member):
+        stats = self._stats.get(member.guild.id)
+        if stats is not None:
+            stats.add(member)
+
+    def member_remove(self, member):
+        stats = self._stats.get(member.guild.id)
+        if stats is not None:
+            stats.remove(member)
+
+    def member_update(self, before, after):
+        stats = self._stats.get(after.guild.id)
+        if stats is not None:
+            stats.update(before, after)
+
+    def forget(self, guild_id):
+        self._stats.pop(guild_id, None)
+
+    def stats(self):
+        return {"guilds": len(self._stats), "builds": self.builds}
+
+
+class RoleIndex:
+    """Which members hold each role in one guild, plus a case-insensitive role name lookup."""
+
+    __slots__ = ("members", "names", "partial")
+
+    def __init__(self, guild, *, partial=False):
+        self.members = {}  # role_id: set of member ids
+        self.names = {}  # lowercased name: role_id
+        self.partial = partial  # Names only; the member cache does not hold the whole guild
+        if not partial:
+            for member in guild.members:
+                self.add(member)
+        self.rename(guild)
+
+    def add(self, member, roles=None):
+        for role in member.roles if roles is None else roles:
+            if not role.is_default():
+                self.members.setdefault(role.id, set()).add(member.id)
+
+    def remove(self, member, roles=None):
+        for role in member.roles if roles is None else roles:
+            holders = self.members.get(role.id)
+            if holders is not None:
+                holders.discard(member.id)
+
+    def rename(self, guild):
+        """Rebuild the name lookup; with duplicate names the lowest role wins, like `discord.utils.find`."""
+        self.names = {}
+        for role in guild.roles:
+            self.names.setdefault(role.name.lower(), role.id)
+
+
+class RoleIndexCache:
+    """Per-guild `RoleIndex`, built from the member cache on first use and kept current from events."""
+
+    def __init__(self):
+        self._indexes = {}
+        self.builds = 0
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def get(self, guild):
+        """Return the index for a chunked `guild`, building it on the first call.
+
+        An unchunked guild gets a partial, uncached index with role names only,
+        since the member cache would leave most role holders out of it.
+        """
+        index = self._indexes.get(guild.id)
+        if index is None:
+            if not guild.chunked:
+                return RoleIndex(guild, partial=True)
+            index = self._indexes[guild.id] = RoleIndex(guild)
+            self.builds += 1
+        return index
+
+    def find_role(self, guild, name):
+        """Return the role called `name`, ignoring case, or None."""
+        role_id = self.get(guild).names.get(name.lower())
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def member_ids(self, guild, role):
+        """Return the ids of the members holding `role`."""
+        if role.is_default():
+            return {member.id for member in guild.members}
+        index = self.get(guild)
+        if index.partial:
+            raise RuntimeError(f"Guild {guild.id} is not chunked; its role memberships are not indexed")
+        return index.members.get(role.id, set())
+
+    def members(self, guild, role):
+        """Return the members holding `role`, in time proportional to how many there are."""
+        return [member for member in map(guild.get_member, self.member_ids(guild, role)) if member is not None]
+
+    def member_join(self, member):
+        index = self._indexes.get(member.guild.id)
+        if index is not None:
+            index.add(member)
+
+    def member_remove(self, member):
+        index = self._indexes.get(member.guild.id)
+        if index is not None:
+            index.remove(member)
+
+    def member_update(self, before, after):
+        index = self._indexes.get(after.guild.id)
+        if index is not None and before.roles != after.roles:
+            index.remove(before, set(before.roles) - set(after.roles))
+            index.add(after, set(after.roles) - set(before.roles))
+
+    def roles_changed(self, guild):
+        index = self._indexes.get(guild.id)
+        if index is not None:
+            index.rename(guild)
+
+    def role_delete(self, role):
+        index = self._indexes.get(role.guild.id)
+        if index is not None:
+            index.members.pop(role.id, None)
+            index.rename(role.guild)
+
+    def forget(self, guild_id):
+        self._indexes.pop(guild_id, None)
+
+    def stats(self):
+        return {
+            "guilds": len(self._indexes),
+            "builds": self.builds,
+            "entries": sum(len(holders) for index in self._indexes.values() for holders in index.members.values()),
+        }
+
+
+class GuildChunker:
+    """Full member lists for the commands that need them, under the active CacheProfile.
+
+    With the `full` profile every guild is already chunked and this only
+    covers guilds joined since startup. With `ondemand` a guild is chunked
+    the first time a command needs it, and once more than
+    `max_chunked_guilds` are held the least recently used one is dropped
+    from the member cache again. With `minimal` nothing is chunked into the
+    cache; commands get an uncached snapshot that is reused for
+    `snapshot_ttl` seconds so paging through it stays cheap.
+    """
+
+    def __init__(self, profile, *, on_evict=None, snapshot_ttl=60.0, max_snapshots=4):
+        self.profile = profile
+        self.on_evict = on_evict  # Called with the guild id so indexes built from its members are dropped too
+        self.snapshot_ttl = snapshot_ttl
+        self.max_snapshots = max_snapshots
+        self._chunked = OrderedDict()  # guild_id: guild, least recently used first
+        self._snapshots = OrderedDict()  # guild_id: (expires_at, {member_id: member})
+        self._flight = SingleFlight()
+        self.chunks = 0
+        self.evictions = 0
+        self.snapshots = 0
+        self.fetches = 0
+
+    async def ensure(self, guild):
+        """Make sure `guild.members` holds every member. Returns False if the profile never chunks."""
+        if not (self.profile.chunk_at_startup or self.profile.chunk_on_demand):
+            return False
+        if not guild.chunked:
+            await self._flight.do(("chunk", guild.id), lambda: self._chunk(guild))
+        if self.profile.max_chunked_guilds is not None:
+            self._chunked[guild.id] = guild
+            self._chunked.move_to_end(guild.id)
+            while len(self._chunked) > self.profile.max_chunked_guilds:
+                _, evicted = self._chunked.popitem(last=False)
+                self.evict(evicted)
+        return True
+
+    async def _chunk(self, guild):
+        self.chunks += 1
+        await guild.chunk()
+
+    def evict(self, guild):
+        """Drop `guild`'s members from the cache, keeping the bot itself and anyone in voice."""
+        # discord.py has no public way to shrink the member cache, so guard the private one
+        remove = getattr(guild, "_remove_member", None)
+        if remove is None:
+            logging.error(f"discord.py no longer has Guild._remove_member; keeping guild {guild.id} chunked")
+            return
+        keep_voice = self.profile.member_cache_flags.voice
+        for member in list(guild.members):  # A live view of the cache in discord.py 2.x
+            if member.id != guild.me.id and not (keep_voice and member.voice):
+                remove(member)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(guild.id)
+
+    async def members(self, guild):
+        """Every member of `guild`: the cache when the profile allows chunking, otherwise a snapshot."""
+        if await self.ensure(guild):
+            return guild.members
+        return list((await self._snapshot(guild)).values())
+
+    async def _snapshot(self, guild):
+        snapshot = self._snapshots.get(guild.id)
+        if snapshot is not None and snapshot[0] > time.monotonic():
+            self._snapshots.move_to_end(guild.id)
+            return snapshot[1]
+        members = await self._flight.do(("snapshot", guild.id), lambda: guild.chunk(cache=False))
+        self.snapshots += 1
+        by_id = {member.id: member for member in members}
+        self._snapshots[guild.id] = (time.monotonic() + self.snapshot_ttl, by_id)
+        self._snapshots.move_to_end(guild.id)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return by_id
+
+    def get_member(self, guild, user_id):
+        """A cached member, or one from the guild's latest snapshot, without any request."""
+        member = guild.get_member(user_id)
+        if member is None and guild.id in self._snapshots:
+            member = self._snapshots[guild.id][1].get(user_id)
+        return member
+
+    async def fetch_member(self, guild, user_id):
+        """`get_member`, falling back to fetching just this member. Returns None if they left."""
+        member = self.get_member(guild, user_id)
+        if member is not None:
+            return member
+        self.fetches += 1
+        try:
+            return await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+
+    def forget(self, guild_id):
+        self._chunked.pop(guild_id, None)
+        self._snapshots.pop(guild_id, None)
+
+    def stats(self):
+        return {
+            "profile": self.profile.name,
+            "chunked": len(self._chunked),
+            "max_chunked": self.profile.max_chunked_guilds,
+            "chunks": self.chunks,
+            "evictions": self.evictions,
+            "snapshots": self.snapshots,
+            "fetches": self.fetches,
+        }
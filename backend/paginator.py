@@ -0,0 +1,135 @@
+import bisect
+import logging
+from typing import List, NamedTuple, Optional
+
+import discord
+
+from backend.classes import Colors
+from backend.components import ComponentRouter
+
+PREFIX = "pg"
+
+
+class Page(NamedTuple):
+    title: str
+    lines: List[str]
+    first: Optional[int]  # Keys of the first and last item, used as keyset cursors
+    last: Optional[int]
+    has_prev: bool
+    has_next: bool
+    total_pages: Optional[int] = None
+
+
+def slice_page(keys, direction, cursor, per_page):
+    """Keyset-paginate a sorted list, returning `(start, items, has_prev, has_next)`."""
+    if direction == "n":
+        start = bisect.bisect_right(keys, cursor)
+    elif direction == "p":
+        start = max(bisect.bisect_left(keys, cursor) - per_page, 0)
+    else:
+        start = 0
+    items = keys[start:start + per_page]
+    return start, items, start > 0, start + per_page < len(keys)
+
+
+class Paginator:
+    """Stateless paginated embeds.
+
+    A page is fetched from a registered source only when it is shown. The
+    Previous and Next buttons carry everything needed to fetch the next
+    page in their custom_id (`pg:source:arg:direction:cursor:page`), and
+    clicks reach `handle` through the bot's ComponentRouter, so nothing is
+    kept in memory for open menus.
+    """
+
+    def __init__(self):
+        self._sources = {}
+        self._extras = {}
+        self._per_user = set()
+
+    def register(self, name, fetch, extras=None, *, per_user=False):
+        """Serve pages for `name` with `await fetch(guild, arg, direction, cursor)`, which returns a Page or None.
+
+        `extras(guild, arg)` can return more components to show under every page,
+        such as a jump menu. With `per_user`, `arg` is the id of the user who
+        opened the menu and nobody else can use its buttons.
+        """
+        self._sources[name] = fetch
+        if extras is not None:
+            self._extras[name] = extras
+        if per_user:
+            self._per_user.add(name)
+
+    def unregister(self, name):
+        self._sources.pop(name, None)
+        self._extras.pop(name, None)
+        self._per_user.discard(name)
+
+    async def send(self, destination, source, arg, guild):
+        """Send the first page of `source`. Returns False if there is nothing to show."""
+        page = await self._sources[source](guild, arg, "f", None)
+        if page is None or not page.lines:
+            return False
+        await destination.send(embed=self.render(page, 1), view=self.view(source, arg, page, 1, guild))
+        return True
+
+    def render(self, page, number):
+        embed = discord.Embed(title=page.title, description="\n".join(page.lines), color=Colors.default)
+        total = f"/{page.total_pages}" if page.total_pages else ""
+        embed.set_footer(text=f"Page {number}{total}")
+        return embed
+
+    def view(self, source, arg, page, number, guild=None):
+        view = discord.ui.View(timeout=None)
+        if page.has_prev:
+            view.add_item(discord.ui.Button(label="Previous", style=discord.ButtonStyle.primary, custom_id=ComponentRouter.custom_id(PREFIX, source, arg, "p", page.first, number - 1)))
+        if page.has_next:
+            view.add_item(discord.ui.Button(label="Next", style=discord.ButtonStyle.primary, custom_id=ComponentRouter.custom_id(PREFIX, source, arg, "n", page.last, number + 1)))
+        close = ComponentRouter.custom_id(PREFIX, "close", arg) if source in self._per_user else ComponentRouter.custom_id(PREFIX, "close")
+        view.add_item(discord.ui.Button(label="Close", style=discord.ButtonStyle.danger, custom_id=close))
+        extras = self._extras.get(source)
+        for item in extras(guild, arg) if extras else ():
+            view.add_item(item)
+        return ComponentRouter.detach(view)
+
+    async def show(self, interaction, source, arg, page, number):
+        """Replace the clicked message with `page`."""
+        await interaction.response.edit_message(embed=self.render(page, number), view=self.view(source, arg, page, number, interaction.guild))
+
+    @staticmethod
+    async def check_owner(interaction, user_id):
+        """Whether `interaction` comes from the user who opened the menu, telling anyone else otherwise."""
+        if interaction.user.id == int(user_id):
+            return True
+        await interaction.response.send_message("Only the person who opened this menu can use it.", ephemeral=True)
+        return False
+
+    async def handle(self, interaction, args):
+        """ComponentRouter handler for the paginator's buttons."""
+        if args[0] == "close":
+            if len(args) > 1 and not await self.check_owner(interaction, args[1]):
+                return
+            await interaction.response.defer()
+            await interaction.message.delete()
+            return
+        source, arg, direction, cursor, number = args
+        fetch = self._sources.get(source)
+        if fetch is None:
+            await interaction.response.send_message("This menu is no longer available.", ephemeral=True)
+            return
+        if source in self._per_user and not await self.check_owner(interaction, arg):
+            return
+        try:
+            page = await fetch(interaction.guild, int(arg), direction, int(cursor))
+            number = int(number)
+            if page is None or not page.lines:
+                # The data changed underneath the menu; start over from the top
+                page, number = await fetch(interaction.guild, int(arg), "f", None), 1
+        except Exception as e:
+            logging.error(f"Failed to fetch page for {interaction.data['custom_id']}: {e}")
+            await interaction.response.send_message("Could not load that page.", ephemeral=True)
+            return
+        if page is None or not page.lines:
+            await interaction.response.edit_message(content="Nothing left to show.", embed=None, view=None)
+            return
+        await self.show(interaction, source, arg, page, number)
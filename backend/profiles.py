@@ -0,0 +1,84 @@
+import logging
+import os
+import time
+from typing import NamedTuple, Optional
+
+import discord
+
+
+class CacheProfile(NamedTuple):
+    name: str
+    member_cache_flags: discord.MemberCacheFlags
+    chunk_at_startup: bool
+    chunk_on_demand: bool  # Chunk a guild the first time a command needs its full member list
+    max_chunked_guilds: Optional[int]  # On-demand guilds kept chunked before the least recently used is evicted
+    max_messages: Optional[int]
+
+
+def _voice_and_joined():
+    flags = discord.MemberCacheFlags.none()
+    flags.voice = True
+    flags.joined = True  # Members who join while the bot runs, so welcome and moderation flows find them
+    return flags
+
+
+def cache_profile(name=None, max_chunked_guilds=None):
+    """Return the CacheProfile called `name`, read from CACHE_PROFILE when not given.
+
+    - `full`: every member of every guild, chunked at startup. Fastest commands, most memory.
+    - `ondemand`: members are cached as they join or change, and a guild is only
+      chunked when a command needs its whole member list. At most
+      `max_chunked_guilds` (CACHE_MAX_GUILDS, default 50) stay chunked.
+    - `minimal`: only the bot itself, members in voice and members who joined
+      since startup are cached. Commands that need member lists get a
+      short-lived uncached snapshot instead.
+    """
+    name = (name or os.getenv("CACHE_PROFILE") or "full").lower()
+    if max_chunked_guilds is None:
+        max_chunked_guilds = int(os.getenv("CACHE_MAX_GUILDS", "50"))
+    if name == "ondemand":
+        return CacheProfile(name, discord.MemberCacheFlags.all(), False, True, max_chunked_guilds, 250)
+    if name == "minimal":
+        return CacheProfile(name, _voice_and_joined(), False, False, None, 50)
+    if name != "full":
+        logging.error(f"Unknown cache profile '{name}', using 'full'")
+    return CacheProfile("full", discord.MemberCacheFlags.all(), True, False, None, 1000)
+
+
+class StartupTimer:
+    """Wall-clock time spent in each startup phase, in the order the phases ran."""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = {}  # phase name: seconds
+        self._last = self.started
+
+    def mark(self, phase):
+        """Record the time since the previous mark as `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+
+    @property
+    def total(self):
+        return self._last - self.started
+
+    def summary(self):
+        return ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases.items())
+
+
+def memory_mb():
+    """Resident memory of this process in MiB, the peak where /proc is unavailable, or None on Windows."""
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 1048576
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def format_memory(mb):
+    return f"{mb:.0f} MiB" if mb is not None else "unknown"
@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+
+
+class _Window:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+
+class SlidingWindowLimiter:
+    """Per-(channel, user) message limiter using a sliding window counter.
+
+    Each key keeps two counters (this window and the previous one) and the
+    rate is estimated by weighting the previous window by how much of it still
+    overlaps. Windows roll forward lazily on the next hit, so there are no
+    timers or tasks, and the least recently active keys are evicted once
+    `max_entries` is reached.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._windows = OrderedDict()
+        self.evictions = 0
+        self.limited = 0
+
+    def __len__(self):
+        return len(self._windows)
+
+    def hit(self, channel_id: int, user_id: int, limit: int, window: float, now: float = None) -> bool:
+        """Count a message and return False if it goes over `limit` messages per `window` seconds."""
+        now = time.monotonic() if now is None else now
+        key = (channel_id, user_id)
+        state = self._windows.get(key)
+        if state is None:
+            state = self._windows[key] = _Window(now)
+            if len(self._windows) > self.max_entries:
+                self._windows.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._windows.move_to_end(key)
+            elapsed = now - state.start
+            if elapsed >= 2 * window:
+                state.start, state.current, state.previous = now, 0, 0
+            elif elapsed >= window:
+                state.start += window
+                state.previous, state.current = state.current, 0
+
+        state.current += 1
+        overlap = 1 - (now - state.start) / window
+        if state.previous * overlap + state.current > limit:
+            self.limited += 1
+            return False
+        return True
+
+    def reset_channel(self, channel_id: int) -> None:
+        for key in [key for key in self._windows if key[0] == channel_id]:
+            del self._windows[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._windows),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "limited": self.limited,
+        }
@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import re
+import time
+from typing import Optional
+
+from database.models import Timer
+
+_DURATION = re.compile(r"(\d+)\s*([smhdw])", re.IGNORECASE)
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_duration(text: str) -> Optional[datetime.timedelta]:
+    """Parse durations such as `10m`, `2h` or `1d12h`. Returns None if `text` is not one."""
+    if not text or not re.fullmatch(r"(?:\s*\d+\s*[smhdw])+\s*", text, re.IGNORECASE):
+        return None
+    delta = datetime.timedelta()
+    for value, unit in _DURATION.findall(text):
+        delta += datetime.timedelta(**{_UNITS[unit.lower()]: int(value)})
+    return delta if delta.total_seconds() > 0 else None
+
+
+class TimerScheduler:
+    """Durable timers for temporary bans, mutes and jails.
+
+    Timers are stored in the `timers` table and mirrored in an in-memory
+    min-heap, so a single dispatcher task sleeps until the earliest expiry
+    and fires everything that is due in batches. Overdue timers are replayed
+    as soon as the bot is ready after a restart.
+    """
+
+    def __init__(self, bot, *, batch_size: int = 100, max_sleep: float = 300.0):
+        self.bot = bot
+        self.batch_size = batch_size
+        self.max_sleep = max_sleep
+        self._heap = []  # (expires_at, timer_id); cancelled entries are skipped lazily
+        self._timers = {}  # timer_id: Timer
+        self._by_target = {}  # (action, guild_id, user_id): timer_id
+        self._handlers = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.fired = 0
+        self.failed = 0
+
+    def __len__(self):
+        return len(self._timers)
+
+    def register(self, action: str, handler) -> None:
+        """Route expired timers for `action` to the coroutine function `handler(timer)`."""
+        self._handlers[action] = handler
+
+    def unregister(self, action: str) -> None:
+        self._handlers.pop(action, None)
+
+    async def start(self) -> None:
+        for timer in await self.bot.database.get_timers():
+            # With several clusters each one only runs timers for the guilds on its own shards
+            if self.bot.owns_guild(timer.guild_id):
+                self._push(timer)
+        logging.info(f"Loaded {len(self._timers)} pending timers")
+        self._task = asyncio.create_task(self._run(), name="timer-dispatcher")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def schedule(self, action: str, guild_id: int, user_id: int, expires_at: datetime.datetime, payload: Optional[str] = None) -> Timer:
+        """Persist a timer, replacing any existing timer for the same action and user."""
+        timestamp = expires_at.timestamp()
+        timer_id = await self.bot.database.add_timer(action, guild_id, user_id, timestamp, payload)
+        self._forget(self._by_target.get((action, guild_id, user_id)))
+        timer = Timer(timer_id, action, guild_id, user_id, timestamp, payload)
+        self._push(timer)
+        return timer
+
+    async def cancel(self, action: str, guild_id: int, user_id: int) -> bool:
+        timer_id = self._by_target.get((action, guild_id, user_id))
+        if timer_id is None:
+            return False
+        self._forget(timer_id)
+        await self.bot.database.delete_timer(timer_id)
+        return True
+
+    def _push(self, timer: Timer) -> None:
+        self._timers[timer.id] = timer
+        self._by_target[(timer.action, timer.guild_id, timer.user_id)] = timer.id
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (timer.expires_at, timer.id))
+        if earliest is None or timer.expires_at < earliest:
+            self._wakeup.set()
+
+    def _forget(self, timer_id: Optional[int]) -> None:
+        timer = self._timers.pop(timer_id, None)
+        if timer is not None:
+            key = (timer.action, timer.guild_id, timer.user_id)
+            if self._by_target.get(key) == timer_id:
+                del self._by_target[key]
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            _, timer_id = heapq.heappop(self._heap)
+            timer = self._timers.get(timer_id)
+            if timer is not None:
+                self._forget(timer_id)
+                due.append(timer)
+        return due
+
+    async def _run(self) -> None:
+        await self.bot.wait_until_ready()
+        while True:
+            due = self._pop_due(time.time())
+            if due:
+                await self._fire(due)
+                continue
+            self._wakeup.clear()
+            timeout = self.max_sleep
+            if self._heap:
+                timeout = min(max(self._heap[0][0] - time.time(), 0), self.max_sleep)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, due: list) -> None:
+        ready, deferred = [], []
+        for timer in due:
+            (ready if timer.action in self._handlers else deferred).append(timer)
+        # A handler can be missing while its cog reloads; try again shortly
+        for timer in deferred:
+            self._push(timer._replace(expires_at=time.time() + 30))
+
+        results = await asyncio.gather(*(self._handlers[timer.action](timer) for timer in ready), return_exceptions=True)
+        for timer, result in zip(ready, results):
+            if isinstance(result, Exception):
+                self.failed += 1
+                logging.error(f"Timer {timer.id} ({timer.action}) for user {timer.user_id} in guild {timer.guild_id} failed: {result}")
+            else:
+                self.fired += 1
+        # The write queue commits these deletes together
+        await asyncio.gather(*(self.bot.database.delete_timer(timer.id) for timer in ready), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._timers),
+            "heap": len(self._heap),
+            "next_in": max(self._heap[0][0] - time.time(), 0) if self._heap else None,
+            "fired": self.fired,
+            "failed": self.failed,
+        }
@@ -1,12 +1,27 @@
+import time
+IMPORT_STARTED = time.perf_counter()  # Before the heavy imports, so the startup report can time them
+
+import asyncio
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 import logging
 import os
 import datetime
+import math
 import discord_ios
-import aiosqlite
 from backend.classes import Colors, Emojis
+from backend.cache import GuildConfig, GuildConfigCache, PrefixCache
+from backend.components import ComponentRouter
+from backend.dispatch import Priority, RestDispatcher
+from backend.http import HttpClient
+from backend.ipc import IPCClient
+from backend.members import GuildChunker, GuildStatsCache, RoleIndexCache
+from backend.paginator import PREFIX as PAGINATOR_PREFIX, Paginator
+from backend.profiles import StartupTimer, cache_profile, format_memory, memory_mb
+from backend.ratelimit import SlidingWindowLimiter
+from backend.scheduler import TimerScheduler
+from database import DatabaseManager, DatabasePool, migrate
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s: %(message)s')
@@ -21,12 +36,39 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-class DiscordBot(commands.Bot):
-    def __init__(self, intents):
-        super().__init__(command_prefix=self.dynamic_prefix, intents=intents, help_command=None)
-        self.db = None  # Directly use db instead of self.database for clarity
+class DiscordBot(commands.AutoShardedBot):
+    def __init__(self, intents, profile=None, *, cluster_id=None, shard_ids=None, shard_count=None, ipc_port=None):
+        self.startup = StartupTimer(IMPORT_STARTED)
+        self.startup.mark("import")
+        self.cog_load_times = {}  # extension: seconds
+        self.cache_profile = profile or cache_profile()
+        shards = {"shard_ids": shard_ids, "shard_count": shard_count} if shard_ids is not None else {}
+        super().__init__(
+            command_prefix=self.dynamic_prefix, intents=intents, help_command=None,
+            member_cache_flags=self.cache_profile.member_cache_flags,
+            chunk_guilds_at_startup=self.cache_profile.chunk_at_startup,
+            max_messages=self.cache_profile.max_messages,
+            **shards,
+        )
+        self.cluster_id = cluster_id  # None when running as a single process
+        self.ipc = IPCClient(cluster_id, ipc_port, health=self.health) if ipc_port else None
+        self.db = None  # Connection pool, only used directly for startup and shutdown
+        self.database = None  # DatabaseManager, which every cog queries through
+        self.prefixes = PrefixCache(default="!")
+        self.guild_configs = GuildConfigCache()
+        self.message_limiter = SlidingWindowLimiter(max_entries=100_000)
+        self.rest = RestDispatcher(concurrency=8, shed_depth=20)
+        self.http_client = HttpClient()  # Shared session for non-Discord HTTP, opened in setup_hook
+        self.guild_stats = GuildStatsCache()
+        self.role_index = RoleIndexCache()
+        self.chunker = GuildChunker(self.cache_profile, on_evict=self.forget_members)
+        self.components = ComponentRouter()  # Routes clicks on persistent buttons and selects by custom_id
+        self.paginator = Paginator()
+        self.components.register(PAGINATOR_PREFIX, self.paginator.handle)
+        self.timers = None  # TimerScheduler, created once the database is open
         self.start_time = datetime.datetime.now(datetime.timezone.utc)  # Make start_time timezone-aware
         self.uptime = None
+        self.startup_report = None
 
     async def on_ready(self):
         current_time = datetime.datetime.now(datetime.timezone.utc)
@@ -38,6 +80,80 @@ class DiscordBot(commands.Bot):
             logging.info(f"Bot is online. Uptime: {uptime_days} days, {uptime_hours} hours, {uptime_minutes} minutes")
         else:
             logging.error("Uptime is None.")
+        if self.startup_report is None:
+            self.startup.mark("ready")
+            self.startup_report = self.build_startup_report()
+            report = self.startup_report
+            logging.info(
+                f"Startup report: cluster {report['cluster']} with {report['shards']} shards, profile '{report['profile']}' ready in {report['ready_s']:.1f}s, "
+                f"{report['guilds']} guilds, {report['members_cached']}/{report['members_total']} members cached, "
+                f"message cache {report['max_messages']}, {format_memory(report['memory_mb'])} resident"
+            )
+            slowest = sorted(self.cog_load_times.items(), key=lambda item: item[1], reverse=True)[:3]
+            logging.info(
+                f"Startup phases: {self.startup.summary()}; slowest cogs: "
+                + ", ".join(f"{extension} {seconds:.2f}s" for extension, seconds in slowest)
+            )
+
+    def build_startup_report(self):
+        return {
+            "profile": self.cache_profile.name,
+            "ready_s": self.startup.total,
+            "phases": dict(self.startup.phases),
+            "cluster": self.cluster_id,
+            "shards": len(self.shards),
+            "guilds": len(self.guilds),
+            "members_cached": sum(len(guild.members) for guild in self.guilds),
+            "members_total": sum(guild.member_count or 0 for guild in self.guilds),
+            "max_messages": self.cache_profile.max_messages,
+            "memory_mb": memory_mb(),
+        }
+
+    def health(self):
+        """This cluster's health, reported to the launcher and shown by the `clusters` command."""
+        return {
+            "cluster": self.cluster_id,
+            "ready": self.is_ready(),
+            "shards": {
+                str(shard_id): round(latency * 1000) if math.isfinite(latency) else None
+                for shard_id, latency in self.latencies
+            },
+            "guilds": len(self.guilds),
+            "members_cached": sum(len(guild.members) for guild in self.guilds),
+            "memory_mb": memory_mb(),
+            "uptime_s": (datetime.datetime.now(datetime.timezone.utc) - self.start_time).total_seconds(),
+        }
+
+    async def cluster_health(self):
+        """Latest health of every cluster, keyed by cluster id, or just this process when not clustered."""
+        if self.ipc is not None and self.ipc.connected:
+            try:
+                return await self.ipc.request("health")
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                logging.error(f"Failed to fetch cluster health: {e}")
+        return {str(self.cluster_id or 0): self.health()}
+
+    def owns_guild(self, guild_id):
+        """Whether `guild_id` is served by one of this process's shards."""
+        if self.shard_ids is None:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    def publish(self, event, **data):
+        """Tell the other clusters about a change to shared state such as prefixes or guild config."""
+        if self.ipc is not None:
+            self.ipc.publish(event, data)
+
+    async def apply_published_prefix(self, data):
+        if data["prefix"] is None:
+            self.prefixes.delete(data["guild_id"])
+        else:
+            self.prefixes.set(data["guild_id"], data["prefix"])
+
+    async def reload_published_guild_config(self, data):
+        # Another cluster changed this guild's settings; reload them from the shared database
+        guild_id = data["guild_id"]
+        self.guild_configs.put(guild_id, await self._load_guild_config(guild_id))
 
     async def dynamic_prefix(self, bot, message):
         """Dynamically get the prefix for the guild from the database."""
@@ -48,39 +164,91 @@ class DiscordBot(commands.Bot):
 
     async def get_server_prefix(self, guild_id):
         """Utility function to fetch the current guild prefix."""
-        default_prefix = "!"  # Default to '!' or retrieve from a config/environment variable
         try:
-            async with self.db.execute("SELECT prefix FROM guild_prefixes WHERE guild_id = ?", (guild_id,)) as cursor:
-                result = await cursor.fetchone()
-                return result[0] if result else default_prefix
+            return await self.prefixes.get(guild_id, self.database.get_prefix)
         except Exception as e:
             logging.error(f"Failed to fetch prefix for guild {guild_id}: {e}")
-            return default_prefix
+            return self.prefixes.default
+
+    async def warm_prefixes(self):
+        """Load every custom prefix in one query so messages never hit the database."""
+        try:
+            self.prefixes.warm(await self.database.get_prefixes())
+        except Exception as e:
+            logging.error(f"Failed to warm prefix cache, falling back to lazy loading: {e}")
+
+    async def get_guild_config(self, guild_id):
+        """Return the cached moderation settings for a guild."""
+        return await self.guild_configs.get(guild_id, self._load_guild_config)
+
+    async def _load_guild_config(self, guild_id):
+        config = GuildConfig(guild_id)
+        setup = await self.database.get_jail_setup(guild_id)
+        if setup:
+            config.set_jail(setup)
+        config.mute_role_id = await self.database.get_mute_role(guild_id)
+        for limit in await self.database.get_message_limits(guild_id):
+            config.message_limits[limit.channel_id] = limit
+        return config
+
+    async def warm_guild_configs(self):
+        """Load jail setups, mute roles and message limits for every guild in three queries."""
+        try:
+            self.guild_configs.warm(
+                await self.database.get_jail_setups(),
+                await self.database.get_mute_roles(),
+                await self.database.get_message_limits(),
+            )
+        except Exception as e:
+            logging.error(f"Failed to warm guild config cache, falling back to lazy loading: {e}")
 
     async def init_db(self):
-        self.db = await aiosqlite.connect('database/database.db')
-        schema_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "database", "schema.sql")
-        if os.path.exists(schema_path):
-            with open(schema_path, 'r') as schema_file:
-                schema_sql = schema_file.read()
-            logging.info("Executing schema SQL script.")
-            await self.db.executescript(schema_sql)
-            await self.db.commit()
+        self.db = DatabasePool()
+        await self.db.open()
+        await migrate(self.db)
+        self.database = DatabaseManager(pool=self.db)
+
+    async def close(self):
+        await super().close()
+        if self.ipc is not None:
+            await self.ipc.close()
+        await self.http_client.close()
+        if self.timers is not None:
+            await self.timers.close()
+        if self.db is not None:
+            await self.db.close()
 
     async def setup_hook(self):
+        self.startup.mark("login")
+        await self.http_client.start()
         await self.init_db()
+        await self.warm_prefixes()
+        await self.warm_guild_configs()
+        self.startup.mark("database")
+        self.timers = TimerScheduler(self)
+        await self.timers.start()
+        self.startup.mark("timers")
         await self.load_cogs()
+        self.startup.mark("cogs")
+        if self.ipc is not None:
+            self.ipc.on("prefix", self.apply_published_prefix)
+            self.ipc.on("guild_config", self.reload_published_guild_config)
+            await self.ipc.start()
 
     async def load_cogs(self):
+        """Load every cog in cogs/ concurrently; cogs only look each other up at command time, never while loading."""
         cogs_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "cogs")
-        for file in os.listdir(cogs_dir):
-            if file.endswith(".py"):
-                extension = file[:-3]
-                try:
-                    await self.load_extension(f"cogs.{extension}")
-                    logging.info(f"Loaded extension '{extension}'")
-                except Exception as e:
-                    logging.error(f"Failed to load extension {extension}.", exc_info=True)
+        extensions = sorted(file[:-3] for file in os.listdir(cogs_dir) if file.endswith(".py"))
+        await asyncio.gather(*(self.load_cog(extension) for extension in extensions))
+
+    async def load_cog(self, extension):
+        started = time.perf_counter()
+        try:
+            await self.load_extension(f"cogs.{extension}")
+            self.cog_load_times[extension] = time.perf_counter() - started
+            logging.info(f"Loaded extension '{extension}' in {self.cog_load_times[extension]:.2f}s")
+        except Exception as e:
+            logging.error(f"Failed to load extension {extension}.", exc_info=True)
 
     async def on_message(self, message):
         if message.author.bot:
@@ -90,6 +258,40 @@ class DiscordBot(commands.Bot):
             await message.channel.send(f"My prefix here is `{prefix}`.")
         await self.process_commands(message)
 
+    async def on_interaction(self, interaction):
+        await self.components.dispatch(interaction)
+
+    async def on_member_join(self, member):
+        self.guild_stats.member_join(member)
+        self.role_index.member_join(member)
+
+    async def on_member_remove(self, member):
+        self.guild_stats.member_remove(member)
+        self.role_index.member_remove(member)
+
+    async def on_member_update(self, before, after):
+        self.guild_stats.member_update(before, after)
+        self.role_index.member_update(before, after)
+
+    async def on_guild_role_create(self, role):
+        self.role_index.roles_changed(role.guild)
+
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name or before.position != after.position:
+            self.role_index.roles_changed(after.guild)
+
+    async def on_guild_role_delete(self, role):
+        self.role_index.role_delete(role)
+
+    async def on_guild_remove(self, guild):
+        self.chunker.forget(guild.id)
+        self.forget_members(guild.id)
+
+    def forget_members(self, guild_id):
+        """Drop the indexes built from a guild's member list once that list is no longer cached."""
+        self.guild_stats.forget(guild_id)
+        self.role_index.forget(guild_id)
+
     async def on_command_error(self, context, error):
         if isinstance(error, commands.CommandNotFound):
             prefix = await self.get_server_prefix(context.guild.id if context.guild else None)
@@ -97,7 +299,10 @@ class DiscordBot(commands.Bot):
                 description=f"{Emojis.warning} Command not found. Use `{prefix}help` for a list of commands.",
                 color=Colors.yellow
             )
-            await context.send(embed=embed)
+            await self.rest.send(
+                context, route="command_not_found", priority=Priority.COSMETIC, key=(context.channel.id, context.author.id),
+                guild_id=context.guild.id if context.guild else None, shed=True, embed=embed
+            )
         elif isinstance(error, commands.CommandOnCooldown):
             embed = discord.Embed(description=f"{Emojis.warning} This command is on cooldown.", color=Colors.yellow)
             await context.send(embed=embed)
@@ -109,5 +314,6 @@ class DiscordBot(commands.Bot):
             embed = discord.Embed(description=f"{Emojis.wrong} An error occurred: {str(error)}", color=Colors.red)
             await context.send(embed=embed)
 
-bot = DiscordBot(intents=intents)
-bot.run(os.getenv("TOKEN"))
+if __name__ == "__main__":
+    bot = DiscordBot(intents=intents)
+    bot.run(os.getenv("TOKEN"))
@@ -3,70 +3,183 @@ from discord.ext import commands
 import asyncio
 import datetime
 import re
-import aiosqlite
 import logging
 import json
 from discord.ui import Button, View
+from backend.bulk import BulkResult, edit_overwrite, run_bulk
 from backend.classes import Colors, Emojis
+from backend.components import ComponentRouter
+from backend.dispatch import Priority
+from backend.paginator import Page, slice_page
+from backend.scheduler import parse_duration
+from database.models import JailSetup, UnbanJob
+from typing import Optional
 from collections import defaultdict
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
 
 
-# RoleMembersView class
-class RoleMembersView(View):
-    def __init__(self, ctx, role, members, per_page=10):
-        super().__init__(timeout=60)
-        self.ctx = ctx
-        self.role = role
-        self.members = members
-        self.per_page = per_page
-        self.current_page = 0
-        self.total_pages = (len(members) - 1) // per_page + 1
-        self.add_buttons()
-
-    def add_buttons(self):
-        if self.current_page > 0:
-            prev_button = Button(label="Previous", style=discord.ButtonStyle.primary)
-            prev_button.callback = self.previous_page
-            self.add_item(prev_button)
-        
-        if self.current_page < self.total_pages - 1:
-            next_button = Button(label="Next", style=discord.ButtonStyle.primary)
-            next_button.callback = self.next_page
-            self.add_item(next_button)
-        
-        close_button = Button(label="Close", style=discord.ButtonStyle.danger)
-        close_button.callback = self.close
-        self.add_item(close_button)
-
-    async def previous_page(self, interaction: discord.Interaction):
-        self.current_page -= 1
-        await self.update_message(interaction)
-
-    async def next_page(self, interaction: discord.Interaction):
-        self.current_page += 1
-        await self.update_message(interaction)
-
-    async def close(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        await interaction.message.delete()
-        self.stop()
-
-    async def update_message(self, interaction: discord.Interaction):
-        self.clear_items()
-        self.add_buttons()
-        embed = self.create_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
-
-    def create_embed(self):
-        start = self.current_page * self.per_page
-        end = start + self.per_page
-        members_list = "\n".join([f"{i+1}. {member.display_name}" for i, member in enumerate(self.members[start:end], start=start)])
-        embed = discord.Embed(title=f"Members in {self.role.name}", description=f"```{members_list}```", color=Colors.default)
-        embed.set_footer(text=f"Page {self.current_page + 1}/{self.total_pages}")
-        return embed
+class MassUnbanFlags(commands.FlagConverter, prefix="--", delimiter=" "):
+    reason: Optional[str] = None
+    before: Optional[str] = None
+
+
+class MemberSelector(commands.Converter):
+    """A single member, or `humans`, `bots`, `all`, `in:<role>` or `joined:<YYYY-MM-DD>` for bulk role changes."""
+
+    async def convert(self, ctx, argument):
+        keyword, _, value = argument.partition(":")
+        keyword = keyword.lower()
+        if keyword == "humans":
+            return RoleSelection("all humans", lambda member: not member.bot)
+        if keyword == "bots":
+            return RoleSelection("all bots", lambda member: member.bot)
+        if keyword in ("all", "everyone"):
+            return RoleSelection("everyone", lambda member: True)
+        if keyword == "in" and value:
+            role = await commands.RoleConverter().convert(ctx, value)
+            return RoleSelection(f"members of {role.name}", lambda member: role in member.roles, role=role)
+        if keyword == "joined" and value:
+            try:
+                date = datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+            except ValueError:
+                raise commands.BadArgument("Dates must look like `joined:2024-01-31`.")
+            return RoleSelection(f"members who joined after {value}", lambda member: member.joined_at is not None and member.joined_at > date)
+        return await commands.MemberConverter().convert(ctx, argument)
+
+
+class RoleSelection:
+    __slots__ = ("description", "matches", "role")
+
+    def __init__(self, description, matches, role=None):
+        self.description = description
+        self.matches = matches
+        self.role = role  # Set for `in:<role>`, so candidates come from the role index
+
+
+AUDIT_LOG_DAYS = 45  # How long Discord keeps audit log entries
+
+
+class BanFilter:
+    """Matches ban entries against a mass unban's reason pattern and `--before` cutoff.
+
+    Bans carry no date, so anyone in the ban audit log since the cutoff was
+    banned on or after it. That only proves the rest were banned earlier
+    while the cutoff is inside the audit log's window, so `refresh` refuses
+    older cutoffs. Call it before each batch so bans made while a long job
+    runs are looked up too.
+    """
+
+    def __init__(self, guild, reason_pattern, banned_before):
+        self.guild = guild
+        self.pattern = re.compile(reason_pattern, re.IGNORECASE) if reason_pattern else None
+        self.banned_before = banned_before
+        self.recent = set()  # ids banned on or after the cutoff
+        self.scanned_until = None
+
+    @staticmethod
+    def audit_log_covers(timestamp):
+        oldest = discord.utils.utcnow() - datetime.timedelta(days=AUDIT_LOG_DAYS)
+        return timestamp >= oldest.timestamp()
+
+    async def refresh(self):
+        if self.banned_before is None:
+            return
+        if not self.audit_log_covers(self.banned_before):
+            raise ValueError(f"the --before date is now more than {AUDIT_LOG_DAYS} days ago, past what the audit log can confirm")
+        after = self.scanned_until or datetime.datetime.fromtimestamp(self.banned_before, datetime.timezone.utc)
+        scanned_until = discord.utils.utcnow()
+        async for entry in self.guild.audit_logs(action=discord.AuditLogAction.ban, after=after, limit=None):
+            if entry.target is not None:
+                self.recent.add(entry.target.id)
+        self.scanned_until = scanned_until
+
+    def __call__(self, entry):
+        if entry.user.id in self.recent:
+            return False
+        return self.pattern is None or (entry.reason is not None and self.pattern.search(entry.reason) is not None)
+
+
+class UnbanProgress:
+    """Live counters for a running mass unban, rendered into one throttled status message."""
+
+    def __init__(self, job, message=None):
+        self.job = job
+        self.message = message
+        self.task = None
+        self.seen = 0
+        self.unbanned = job.unbanned
+        self.failed = job.failed
+        self.last_user_id = job.last_user_id
+        self.errors = []
+        self.error = None  # Why the job paused, if it stopped before the last ban
+        self.finished = False
+
+    def embed(self):
+        if self.error is not None:
+            return discord.Embed(
+                description=f"{Emojis.warning} Mass unban paused after {self.unbanned} unbans: {self.error}\n"
+                            "Use `massunban resume` to continue from the last checkpoint or `massunban cancel` to drop it.",
+                color=Colors.yellow
+            )
+        if not self.finished:
+            return discord.Embed(
+                description=f"{Emojis.warning} Mass unban running: {self.unbanned} unbanned, {self.failed} failed, {self.seen} bans checked...",
+                color=Colors.yellow
+            )
+        description = f"{Emojis.check} Successfully unbanned {self.unbanned} users."
+        if self.failed or self.errors:
+            description += f"\n{self.failed} failed:\n" + "\n".join(self.errors)
+        return discord.Embed(description=description, color=Colors.yellow if self.failed else Colors.green)
+
+    async def report(self):
+        if self.message is None:
+            return
+        try:
+            await self.message.edit(embed=self.embed())
+        except discord.HTTPException as e:
+            logging.error(f"Could not update mass unban progress in guild {self.job.guild_id}: {e}")
+            self.message = None
+
+    async def report_every(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.report()
+
+
+class RoleJob:
+    """A running bulk role change and the one message it reports progress in."""
+
+    def __init__(self, title, result):
+        self.title = title
+        self.result = result
+        self.message = None
+        self.task = None
+        self.cancelled = False
+
+    def embed(self):
+        result = self.result
+        if result.finished is None:
+            eta = f"{result.eta:.0f}s" if result.eta is not None else "unknown"
+            return discord.Embed(
+                description=f"{Emojis.warning} {self.title}: {result.done}/{result.total} members ({result.rate:.1f}/s, ETA {eta})",
+                color=Colors.yellow
+            )
+        state = "Cancelled" if self.cancelled else "Finished"
+        description = (
+            f"{Emojis.check} {state} {self.title[0].lower()}{self.title[1:]}: {result.changed} changed, "
+            f"{result.skipped} skipped, {len(result.failed)} failed in {result.elapsed:.0f}s ({result.rate:.1f}/s)"
+        )
+        if result.failed:
+            description += "\n" + "\n".join(f"{member}: {error}" for member, error in result.failed[:5])
+        return discord.Embed(description=description, color=Colors.yellow if self.cancelled or result.failed else Colors.green)
+
+    async def report(self, _=None):
+        try:
+            await self.message.edit(embed=self.embed())
+        except discord.HTTPException as e:
+            logging.error(f"Could not update bulk role job progress: {e}")
 
 
 class Moderation(commands.Cog):
@@ -74,29 +187,85 @@ class Moderation(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.guild_mute_roles = {}  # This will store guild_id: mute_role_id pairs
-        self.message_counts = defaultdict(lambda: defaultdict(int))
-        self.message_limits = defaultdict(int)
-        self.time_frame = 60  # Time frame in seconds
-        self.reset_tasks = defaultdict(lambda: defaultdict(asyncio.Task))
+        self.mute_role_locks = defaultdict(asyncio.Lock)  # Stops concurrent mutes from creating two roles
+        self.unban_jobs = {}  # guild_id: UnbanProgress
+        self.role_jobs = {}  # guild_id: RoleJob
+        self.resume_task = None
 
 
 
 # Helper functions
-    async def _execute_query(self, query, params=None):
-        async with self.bot.db.execute(query, params) as cursor:
-            return await cursor.fetchall()
-
-    async def _execute_commit(self):
-        await self.bot.db.commit()
-
     async def create_embed(self, ctx, title, description, color):
         embed = discord.Embed(title=title, description=description, color=color)
         await ctx.send(embed=embed)
 
-    async def schedule_unban(self, user: discord.Member, unban_time: datetime.datetime):
-        await asyncio.sleep((unban_time - datetime.datetime.utcnow()).total_seconds())
-        await user.guild.unban(user)
+    async def cog_load(self):
+        self.bot.timers.register("unban", self.expire_ban)
+        self.bot.timers.register("unmute", self.expire_mute)
+        self.bot.timers.register("unjail", self.expire_jail)
+        self.bot.paginator.register("inrole", self.inrole_page)
+        self.bot.paginator.register("warn", self.warnings_page)
+        self.bot.components.register("unsetme", self.unsetme_confirm)
+        self.resume_task = asyncio.create_task(self.resume_unban_jobs())
+
+    async def cog_unload(self):
+        for action in ("unban", "unmute", "unjail"):
+            self.bot.timers.unregister(action)
+        self.bot.paginator.unregister("inrole")
+        self.bot.paginator.unregister("warn")
+        self.bot.components.unregister("unsetme")
+        # Running mass unbans keep their checkpoint and resume when the cog loads again
+        self.resume_task.cancel()
+        for progress in list(self.unban_jobs.values()):
+            progress.task.cancel()
+        for job in list(self.role_jobs.values()):
+            job.task.cancel()
+
+    async def expire_ban(self, timer):
+        guild = self.bot.get_guild(timer.guild_id)
+        if guild is None:
+            return
+        try:
+            await guild.unban(discord.Object(id=timer.user_id), reason="Temporary ban expired")
+        except discord.NotFound:
+            pass  # Already unbanned by hand
+
+    async def expire_mute(self, timer):
+        guild = self.bot.get_guild(timer.guild_id)
+        member = await self.bot.chunker.fetch_member(guild, timer.user_id) if guild else None
+        if member is None:
+            return
+        mute_role = await self.resolve_mute_role(guild)
+        if mute_role and mute_role in member.roles:
+            await member.remove_roles(mute_role, reason="Temporary mute expired")
+
+    async def expire_jail(self, timer):
+        guild = self.bot.get_guild(timer.guild_id)
+        if guild is None:
+            return
+        record = await self.bot.database.get_jailed(guild.id, timer.user_id)
+        if record is None:
+            return
+        member = await self.bot.chunker.fetch_member(guild, timer.user_id)
+        if member is None:
+            await self.bot.database.remove_jailed(guild.id, timer.user_id)
+            return
+        try:
+            await self.release_from_jail(guild, member, record, guild.me, reason="Temporary jail expired")
+        except Exception:
+            # The record is still there, so try again later instead of leaving them jailed for good
+            retry_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=10)
+            await self.bot.timers.schedule("unjail", guild.id, member.id, retry_at)
+            raise
+
+    @staticmethod
+    def split_duration(text):
+        """Split a leading duration such as `10m` off `text`, returning `(timedelta or None, rest)`."""
+        if not text:
+            return None, text
+        first, _, rest = text.partition(" ")
+        duration = parse_duration(first)
+        return (duration, rest.strip()) if duration else (None, text)
 
     async def send_warn_embed(self, ctx):
         """Send the warning embed for invalid input."""
@@ -111,16 +280,73 @@ class Moderation(commands.Cog):
         )
         await ctx.send(embed=embed)
 
-    async def jail_user(self, ctx, member: discord.Member, reason: str):
-        # Assuming you have the jail_log_channel_id stored in your database
-        log_channel_id = await self.get_jail_log_channel_id(ctx.guild.id)
-        log_channel = ctx.guild.get_channel(log_channel_id)
+    async def send_jail_log(self, guild, config, action, members, moderator, reason=None):
+        """Post one modlog entry to the jail-log channel covering every member in `members`."""
+        log_channel = guild.get_channel(config.jail_log_channel_id) if config.jail_configured else None
+        if log_channel is None or not members:
+            return
+        users = "\n".join(f"User: {member} ({member.id})" for member in members[:15])
+        if len(members) > 15:
+            users += f"\n...and {len(members) - 15} more"
+        reason_line = f"Reason: {reason}\n" if reason else ""
+        log_embed = discord.Embed(title="Modlog Entry", color=discord.Color.blue())
+        log_embed.add_field(name="Information", value=f"Case #XXX | {action}\n{users}\nModerator: {moderator} ({moderator.id})\n{reason_line}Today at {datetime.datetime.utcnow().strftime('%H:%M %p')} UTC", inline=False)
+        await log_channel.send(embed=log_embed)
 
-        embed = discord.Embed(title="Modlog Entry", color=discord.Color.blue())
-        embed.add_field(name="Information", value=f"Case #XXX | Jailed\nUser: {member} ({member.id})\nModerator: {ctx.author} ({ctx.author.id})\nReason: {reason}\nToday at {datetime.datetime.utcnow().strftime('%H:%M %p')} UTC", inline=False)
-        await log_channel.send(embed=embed)
+    @staticmethod
+    def can_assign(guild, role):
+        return not role.is_default() and not role.managed and role < guild.me.top_role
+
+    async def replace_roles(self, member, roles, reason=None):
+        """Give `member` exactly `roles` in one request, falling back to one call per role if that edit is rejected.
+
+        The fallback adds the missing roles before removing any, and raises
+        RuntimeError without removing anything if one of `roles` could not be added.
+        """
+        roles = list(dict.fromkeys(roles))
+        try:
+            await self.bot.rest.submit("jail", lambda: member.edit(roles=roles, reason=reason), priority=Priority.CRITICAL, guild_id=member.guild.id)
+            return
+        except discord.HTTPException as e:
+            logging.error(f"Role edit for {member} ({member.id}) failed, changing roles one at a time: {e}")
+        current = list(member.roles)  # add_roles does not update the cached member, so this stays the starting point
+        missing = []
+        for role in roles:
+            if role not in current:
+                try:
+                    await member.add_roles(role, reason=reason)
+                except discord.HTTPException as e:
+                    logging.error(f"Failed to add role {role.name}: {str(e)}")
+                    missing.append(role)
+        if missing:
+            raise RuntimeError(f"could not add {', '.join(role.name for role in missing)}")
+        wanted = set(roles)
+        for role in current:
+            if role not in wanted and self.can_assign(member.guild, role):
+                try:
+                    await member.remove_roles(role, reason=reason)
+                except discord.HTTPException as e:
+                    logging.error(f"Failed to remove role {role.name}: {str(e)}")
+
+    async def resolve_mute_role(self, guild: discord.Guild, *, create: bool = False):
+        """Return the guild's mute role, adopting an existing "Muted" role (or creating one) the first time."""
+        config = await self.bot.get_guild_config(guild.id)
+        role = guild.get_role(config.mute_role_id) if config.mute_role_id else None
+        if role is not None:
+            return role
+        async with self.mute_role_locks[guild.id]:
+            # Another invocation may have resolved the role while this one waited
+            role = guild.get_role(config.mute_role_id) if config.mute_role_id else None
+            if role is None:
+                role = discord.utils.get(guild.roles, name="Muted")
+                if role is None and create:
+                    role = await guild.create_role(name="Muted")
+                if role is not None:
+                    await self.bot.database.set_mute_role(guild.id, role.id)
+                    config.mute_role_id = role.id
+                    self.bot.publish("guild_config", guild_id=guild.id)
+        return role
 
-        
     @staticmethod
     def get_color(color):
         return getattr(Colors, color.lower(), Colors.default)
@@ -140,6 +366,11 @@ class Moderation(commands.Cog):
             await self.create_embed(ctx, "Command: ban", "Bans the mentioned user from the guild.\n```Syntax: ,ban (user) (time) (reason)\nExample: ,ban omtfiji 1h Reason```", self.get_color('default'))
             return
 
+        duration = parse_duration(time) if time else None
+        if time and duration is None:
+            # Not a duration, so it is the first word of the reason
+            reason = f"{time} {reason}" if reason else time
+
         if not reason:
             reason = f'Banned by {ctx.author} / No reason provided'
 
@@ -153,20 +384,16 @@ class Moderation(commands.Cog):
             return await ctx.send(f'I cannot ban {user.mention} because their highest role is above or equal to my highest role')
 
         try:
-            await user.ban(reason=reason)
-            description = f"{Emojis.check} {ctx.author.mention} `{user}` has been banned."
+            await self.bot.rest.submit("ban", lambda: user.ban(reason=reason), priority=Priority.CRITICAL, guild_id=ctx.guild.id)
+            # If time is provided, schedule unban
+            if duration:
+                unban_time = datetime.datetime.now(datetime.timezone.utc) + duration
+                await self.bot.timers.schedule("unban", ctx.guild.id, user.id, unban_time)
+                description = f"{Emojis.check} {ctx.author.mention} `{user}` has been banned for `{time}`."
+            else:
+                description = f"{Emojis.check} {ctx.author.mention} `{user}` has been banned."
             embed = discord.Embed(description=description, color=self.get_color('green'))
             await ctx.send(embed=embed)
-
-            # If time is provided, schedule unban
-            if time:
-                time_units = {'h': 'hours', 'd': 'days', 'm': 'minutes'}
-                time_value, time_unit = int(time[:-1]), time[-1]
-                if time_unit in time_units:
-                    unban_time = datetime.datetime.utcnow() + datetime.timedelta(**{time_units[time_unit]: time_value})
-                    await self.schedule_unban(user, unban_time)
-                else:
-                    return await ctx.send("Invalid time unit. Use 'h' for hours, 'd' for days, or 'm' for minutes.")
         except discord.Forbidden:
             description = f"{Emojis.wrong} Failed to send a message to {user.mention} or ban them."
             embed = discord.Embed(description=description, color=self.get_color('red'))
@@ -182,6 +409,7 @@ class Moderation(commands.Cog):
 
         try:
             await ctx.guild.unban(user)
+            await self.bot.timers.cancel("unban", ctx.guild.id, user.id)
             description = f"{Emojis.check} `{user}` has been unbanned."
             embed = discord.Embed(description=description, color=self.get_color('green'))
             await ctx.send(embed=embed)
@@ -194,28 +422,206 @@ class Moderation(commands.Cog):
             embed = discord.Embed(description=description, color=self.get_color('red'))
             await ctx.send(embed=embed)
 
-    @commands.command(name="massunban")
+    @commands.group(name="massunban", invoke_without_command=True)
+    @commands.has_permissions(ban_members=True)
+    async def massunban(self, ctx, *, flags: MassUnbanFlags):
+        """Unban every banned user, optionally filtered with `--reason <regex>` and `--before <YYYY-MM-DD>`."""
+        filters = await self.parse_unban_filters(ctx, flags)
+        if filters is None:
+            return
+        if ctx.guild.id in self.unban_jobs:
+            embed = discord.Embed(description=f"{Emojis.warning} A mass unban is already running here. Use `massunban status` or `massunban cancel`.", color=self.get_color('yellow'))
+            return await ctx.send(embed=embed)
+        if await self.bot.database.get_unban_job(ctx.guild.id):
+            embed = discord.Embed(description=f"{Emojis.warning} A paused mass unban is waiting here. Use `massunban resume` or `massunban cancel`.", color=self.get_color('yellow'))
+            return await ctx.send(embed=embed)
+
+        message = await ctx.send(embed=discord.Embed(description=f"{Emojis.warning} Starting mass unban...", color=self.get_color('yellow')))
+        job = UnbanJob(ctx.guild.id, ctx.channel.id, message.id, ctx.author.id, *filters, 0, 0, 0)
+        await self.bot.database.add_unban_job(job)
+        self.start_unban_job(ctx.guild, job, message)
+
+    @massunban.command(name="count")
+    @commands.has_permissions(ban_members=True)
+    async def massunban_count(self, ctx, *, flags: MassUnbanFlags):
+        """Dry run: count the bans a mass unban with these filters would lift."""
+        filters = await self.parse_unban_filters(ctx, flags)
+        if filters is None:
+            return
+        async with ctx.typing():
+            matches = BanFilter(ctx.guild, *filters)
+            await matches.refresh()
+            total = matching = 0
+            async for entry in ctx.guild.bans(limit=None):
+                total += 1
+                matching += matches(entry)
+        embed = discord.Embed(description=f"{Emojis.check} {matching} of {total} bans match. Nothing was unbanned.", color=self.get_color('green'))
+        await ctx.send(embed=embed)
+
+    @massunban.command(name="status")
+    @commands.has_permissions(ban_members=True)
+    async def massunban_status(self, ctx):
+        """Show the progress of the running mass unban."""
+        progress = self.unban_jobs.get(ctx.guild.id)
+        if progress is None:
+            embed = discord.Embed(description=f"{Emojis.warning} No mass unban is running.", color=self.get_color('yellow'))
+        else:
+            embed = progress.embed()
+        await ctx.send(embed=embed)
+
+    @massunban.command(name="resume")
+    @commands.has_permissions(ban_members=True)
+    async def massunban_resume(self, ctx):
+        """Continue a mass unban that paused on an error, from its last checkpoint."""
+        if ctx.guild.id in self.unban_jobs:
+            embed = discord.Embed(description=f"{Emojis.warning} A mass unban is already running here.", color=self.get_color('yellow'))
+            return await ctx.send(embed=embed)
+        job = await self.bot.database.get_unban_job(ctx.guild.id)
+        if job is None:
+            embed = discord.Embed(description=f"{Emojis.warning} There is no paused mass unban to resume.", color=self.get_color('yellow'))
+            return await ctx.send(embed=embed)
+        await self.bot.database.set_unban_job_paused(ctx.guild.id, False)
+        message = await ctx.send(embed=discord.Embed(description=f"{Emojis.warning} Resuming mass unban...", color=self.get_color('yellow')))
+        self.start_unban_job(ctx.guild, job._replace(paused=False), message)
+
+    @massunban.command(name="cancel")
     @commands.has_permissions(ban_members=True)
-    async def massunban(self, ctx):
-        """Unban all users from the server."""
-        total_unbanned = 0
-        async for ban_entry in ctx.guild.bans():
-            user = ban_entry.user
+    async def massunban_cancel(self, ctx):
+        """Stop the running or paused mass unban. Users already unbanned stay unbanned."""
+        progress = self.unban_jobs.get(ctx.guild.id)
+        if progress is None:
+            job = await self.bot.database.get_unban_job(ctx.guild.id)
+            if job is None:
+                embed = discord.Embed(description=f"{Emojis.warning} No mass unban is running.", color=self.get_color('yellow'))
+                return await ctx.send(embed=embed)
+            await self.bot.database.delete_unban_job(ctx.guild.id)
+            embed = discord.Embed(description=f"{Emojis.check} Dropped the paused mass unban after {job.unbanned} unbans.", color=self.get_color('green'))
+            return await ctx.send(embed=embed)
+        progress.task.cancel()
+        await self.bot.database.delete_unban_job(ctx.guild.id)
+        embed = discord.Embed(description=f"{Emojis.check} Cancelled the mass unban after {progress.unbanned} unbans.", color=self.get_color('green'))
+        await ctx.send(embed=embed)
+
+    async def parse_unban_filters(self, ctx, flags):
+        """Validate the massunban flags, returning `(reason_pattern, banned_before)` or None after replying."""
+        if flags.reason is not None:
             try:
-                await ctx.guild.unban(user)
-                total_unbanned += 1
-            except discord.Forbidden:
-                await ctx.send(f"Failed to unban {user.name}#{user.discriminator}.")
-                continue
-            except Exception as e:
-                await ctx.send(f"An error occurred: {str(e)}")
+                re.compile(flags.reason)
+            except re.error as e:
+                embed = discord.Embed(description=f"{Emojis.wrong} Invalid reason pattern: {e}", color=self.get_color('red'))
+                await ctx.send(embed=embed)
+                return None
+        banned_before = None
+        if flags.before is not None:
+            try:
+                date = datetime.datetime.strptime(flags.before, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+            except ValueError:
+                embed = discord.Embed(description=f"{Emojis.wrong} Dates must look like `2024-01-31`.", color=self.get_color('red'))
+                await ctx.send(embed=embed)
+                return None
+            if not BanFilter.audit_log_covers(date.timestamp()):
+                # Without an audit log entry there is no telling when an older ban happened
+                embed = discord.Embed(description=f"{Emojis.wrong} Ban dates come from the audit log, which only reaches back {AUDIT_LOG_DAYS} days. Pick a more recent `--before` date.", color=self.get_color('red'))
+                await ctx.send(embed=embed)
+                return None
+            banned_before = date.timestamp()
+        return flags.reason, banned_before
+
+    def start_unban_job(self, guild, job, message=None):
+        progress = UnbanProgress(job, message)
+        progress.task = asyncio.create_task(self.run_unban_job(guild, progress), name=f"massunban-{guild.id}")
+        self.unban_jobs[guild.id] = progress
+
+        def forget(_):
+            if self.unban_jobs.get(guild.id) is progress:
+                del self.unban_jobs[guild.id]
+        progress.task.add_done_callback(forget)
+
+    async def resume_unban_jobs(self):
+        await self.bot.wait_until_ready()
+        for job in await self.bot.database.get_unban_jobs():
+            if not self.bot.owns_guild(job.guild_id):
+                continue  # Another cluster resumes it
+            if job.paused:
+                continue  # Waits for `massunban resume` or `massunban cancel`
+            guild = self.bot.get_guild(job.guild_id)
+            if guild is None:
+                # Possibly just unavailable during an outage; the checkpoint is only dropped in on_guild_remove
+                logging.info(f"Not resuming mass unban in unavailable guild {job.guild_id}")
                 continue
+            channel = guild.get_channel(job.channel_id)
+            message = channel.get_partial_message(job.message_id) if channel is not None and job.message_id else None
+            logging.info(f"Resuming mass unban in guild {job.guild_id} after user {job.last_user_id}")
+            self.start_unban_job(guild, job, message)
+
+    async def run_unban_job(self, guild, progress):
+        """Page through bans while the previous page is being unbanned, checkpointing after each chunk."""
+        job = progress.job
+        moderator = guild.get_member(job.moderator_id)
+        reason = f"Mass unban by {moderator or job.moderator_id}"
+        matches = BanFilter(guild, job.reason_pattern, job.banned_before)
+        chunks = asyncio.Queue(maxsize=2)
+
+        async def produce():
+            chunk = []
+            cancelled = False
+            try:
+                after = discord.Object(job.last_user_id) if job.last_user_id else discord.utils.MISSING
+                # Bans are paged in ascending user ID order, so the last ID seen is a safe resume point
+                async for entry in guild.bans(limit=None, after=after):
+                    progress.seen += 1
+                    chunk.append(entry)
+                    if len(chunk) == 100:
+                        await chunks.put(chunk)
+                        chunk = []
+                if chunk:
+                    await chunks.put(chunk)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                # Once cancelled nobody drains the queue, so waiting for room would hang forever
+                if not cancelled:
+                    await chunks.put(None)
+
+        async def unban(user):
+            try:
+                await guild.unban(user, reason=reason)
+            except discord.NotFound:
+                return False  # Already unbanned, e.g. before a restart
+            return True
 
-        embed = discord.Embed(
-            color=self.get_color('green'),
-            description=f"{Emojis.check} Successfully unbanned {total_unbanned} users."
-        )
-        await ctx.send(embed=embed)
+        producer = asyncio.create_task(produce())
+        reporter = asyncio.create_task(progress.report_every(3))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await matches.refresh()  # Covers anyone banned since this chunk was listed
+                # The unban route shares one bucket per guild; a few requests in flight keep it saturated
+                result = await run_bulk([entry.user for entry in chunk if matches(entry)], unban, concurrency=5)
+                progress.unbanned += result.changed
+                progress.failed += len(result.failed)
+                progress.errors.extend(f"{user}: {error}" for user, error in result.failed[:5 - len(progress.errors)])
+                progress.last_user_id = chunk[-1].user.id
+                await self.bot.database.update_unban_job(guild.id, progress.last_user_id, progress.unbanned, progress.failed)
+            await producer
+            progress.finished = True
+        except asyncio.CancelledError:
+            producer.cancel()
+            raise
+        except Exception as e:
+            # Keep the checkpoint so a moderator can resume once the error has passed
+            logging.error(f"Mass unban in guild {guild.id} paused: {e}")
+            producer.cancel()
+            progress.error = str(e)
+            await self.bot.database.set_unban_job_paused(guild.id, True)
+        else:
+            await self.bot.database.delete_unban_job(guild.id)
+        finally:
+            reporter.cancel()
+        await progress.report()
 
 
 #mute commands
@@ -224,14 +630,15 @@ class Moderation(commands.Cog):
     @commands.has_permissions(manage_roles=True)
     async def set_mute_role(self, ctx, role: discord.Role):
         """Set a custom mute role for the server."""
-        self.guild_mute_roles[ctx.guild.id] = role.id  # Store the role ID in the dictionary
+        await self.bot.database.set_mute_role(ctx.guild.id, role.id)
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        config.mute_role_id = role.id
+        self.bot.publish("guild_config", guild_id=ctx.guild.id)
         embed = discord.Embed(
             color=self.get_color('green'),  # Assuming you have a method to get colors, adjust as necessary
             description=f"{Emojis.check} Successfully binded the muted role as: {role.mention}"
         )
         await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
-        # Here you would typically save this to a database or a file
-        # Here you would typically save this to a database or a file
 
 
 
@@ -243,15 +650,19 @@ class Moderation(commands.Cog):
             await self.create_embed(ctx, "Command: mute", "Mutes the mentioned user in the server for a specified duration.\n```Syntax: ,mute (user) (duration) (reason)\nExample: ,mute omtfiji 10m Spamming```", self.get_color('default'))
             return
     
-        mute_role_id = self.guild_mute_roles.get(ctx.guild.id)
-        mute_role = ctx.guild.get_role(mute_role_id) if mute_role_id else discord.utils.get(ctx.guild.roles, name="Muted")
-    
-        if not mute_role:
-            mute_role = await ctx.guild.create_role(name="Muted")
-            self.guild_mute_roles[ctx.guild.id] = mute_role.id  # Update the dictionary
-    
+        delta = parse_duration(duration)
+        if duration != "0" and delta is None:
+            # Not a duration, so it is the first word of the reason
+            reason = duration if reason == "No reason provided" else f"{duration} {reason}"
+
+        mute_role = await self.resolve_mute_role(ctx.guild, create=True)
         await member.add_roles(mute_role)
-        duration_display = "`permanently`" if duration == "0" else duration
+        if delta:
+            unmute_time = datetime.datetime.now(datetime.timezone.utc) + delta
+            await self.bot.timers.schedule("unmute", ctx.guild.id, member.id, unmute_time)
+        else:
+            await self.bot.timers.cancel("unmute", ctx.guild.id, member.id)
+        duration_display = f"`{duration}`" if delta else "`permanently`"
         mute_embed = discord.Embed(description=f"{Emojis.check} {member.mention} has been muted for {duration_display}. Reason: {reason}", color=self.get_color('green'))
         await ctx.send(embed=mute_embed)
         
@@ -263,11 +674,10 @@ class Moderation(commands.Cog):
             await self.create_embed(ctx, "Command: unmute", "Unmutes the mentioned user in the server.\n```Syntax: ,unmute (user)\nExample: ,unmute omtfiji```", self.get_color('default'))
             return
     
-        mute_role_id = self.guild_mute_roles.get(ctx.guild.id)
-        mute_role = ctx.guild.get_role(mute_role_id) if mute_role_id else discord.utils.get(ctx.guild.roles, name="Muted")
-    
+        mute_role = await self.resolve_mute_role(ctx.guild)
         if mute_role and mute_role in member.roles:
             await member.remove_roles(mute_role)
+            await self.bot.timers.cancel("unmute", ctx.guild.id, member.id)
             embed = discord.Embed(description=f"{Emojis.check} {member.display_name} has been unmuted.", color=self.get_color('green'))
             await ctx.send(embed=embed)
         else:
@@ -313,7 +723,7 @@ class Moderation(commands.Cog):
         if channel is None:
             channel = ctx.channel  # Default to the current channel if none is specified
 
-        await channel.set_permissions(ctx.guild.default_role, send_messages=False, reason=reason)
+        await self.bot.rest.submit("lockdown", lambda: channel.set_permissions(ctx.guild.default_role, send_messages=False, reason=reason), priority=Priority.CRITICAL, guild_id=ctx.guild.id)
         embed = discord.Embed(
             color=self.get_color('green')  # Adjust the color to match your bot's theme
         )
@@ -321,15 +731,10 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
 
     @lock.command(name="all")
+    @commands.has_permissions(manage_channels=True)
     async def lock_all(self, ctx, *, reason="No reason provided"):
         """Lock all channels in the guild."""
-        for channel in ctx.guild.text_channels:
-            await channel.set_permissions(ctx.guild.default_role, send_messages=False, reason=reason)
-        embed = discord.Embed(
-            color=self.get_color('green')  # Adjust the color to match your bot's theme
-        )
-        embed.description = f"{Emojis.check} {ctx.guild.me.mention} All channels have been locked down for @everyone."
-        await ctx.send(embed=embed)
+        await self.lockdown(ctx, send_messages=False, reason=reason)
 
     @commands.group(invoke_without_command=True)
     @commands.has_permissions(manage_channels=True)
@@ -338,7 +743,7 @@ class Moderation(commands.Cog):
         if channel is None:
             channel = ctx.channel  # Default to the current channel if none is specified
 
-        await channel.set_permissions(ctx.guild.default_role, send_messages=True, reason=reason)
+        await self.bot.rest.submit("lockdown", lambda: channel.set_permissions(ctx.guild.default_role, send_messages=True, reason=reason), priority=Priority.CRITICAL, guild_id=ctx.guild.id)
         embed = discord.Embed(
             color=self.get_color('green')  # Adjust the color to match your bot's theme
         )
@@ -346,15 +751,49 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
 
     @unlock.command(name="all")
+    @commands.has_permissions(manage_channels=True)
     async def unlock_all(self, ctx, *, reason="No reason provided"):
         """Unlock all channels in the guild."""
-        for channel in ctx.guild.text_channels:
-            await channel.set_permissions(ctx.guild.default_role, send_messages=True, reason=reason)
-        embed = discord.Embed(
-            color=self.get_color('green')  # Adjust the color to match your bot's theme
+        await self.lockdown(ctx, send_messages=True, reason=reason)
+
+    async def lockdown(self, ctx, *, send_messages: bool, reason: str):
+        """Set `send_messages` for @everyone on every text channel, reporting progress in one message."""
+        action = "unlocked" if send_messages else "locked down"
+        channels = ctx.guild.text_channels
+        message = await ctx.send(embed=discord.Embed(
+            description=f"{Emojis.warning} {ctx.guild.me.mention}: Updating {len(channels)} channels...",
+            color=self.get_color('yellow')
+        ))
+
+        async def progress(result):
+            if result.finished is None:
+                await message.edit(embed=discord.Embed(
+                    description=f"{Emojis.warning} {ctx.guild.me.mention}: Updated {result.done}/{result.total} channels...",
+                    color=self.get_color('yellow')
+                ))
+
+        # Overwrite edits are bucketed per channel, so channels can be edited side by side;
+        # the concurrency cap keeps the burst under the global request limit
+        edit = edit_overwrite(ctx.guild.default_role, reason=reason, send_messages=send_messages)
+
+        async def worker(channel):
+            return await self.bot.rest.submit("lockdown", lambda: edit(channel), priority=Priority.CRITICAL, guild_id=ctx.guild.id)
+        result = await run_bulk(channels, worker, concurrency=8, progress=progress)
+
+        description = (
+            f"{Emojis.check} {ctx.guild.me.mention}: All channels have been {action} for @everyone "
+            f"({result.changed} changed, {result.skipped} already {action}) in {result.elapsed:.1f}s."
         )
-        embed.description = f"{Emojis.check} {ctx.guild.me.mention} All channels have been unlocked for @everyone."
-        await ctx.send(embed=embed)
+        color = 'green'
+        if result.failed:
+            color = 'yellow'
+            failures = "\n".join(f"{channel.mention}: {error}" for channel, error in result.failed[:10])
+            more = f"\n...and {len(result.failed) - 10} more" if len(result.failed) > 10 else ""
+            description = (
+                f"{Emojis.warning} {ctx.guild.me.mention}: {result.changed + result.skipped}/{result.total} channels {action}, "
+                f"{len(result.failed)} failed:\n{failures}{more}"
+            )
+        await message.edit(embed=discord.Embed(description=description, color=self.get_color(color)))
 
 
 #nicknames command
@@ -433,123 +872,126 @@ class Moderation(commands.Cog):
 
 
 
-# Jail command - ADD TIME ARGUMENT
+# Jail command
 
     @commands.command(
-        name="jail", help="Jail a member", usage="[member] [reason]", description="Moderation"
+        name="jail", help="Jail one or more members", usage="[members...] <time> [reason]", description="Moderation"
     )
     @commands.cooldown(1, 5, commands.BucketType.user)
-    async def jail(self, ctx: commands.Context, member: discord.Member, *, reason="no reason provided"):
+    async def jail(self, ctx: commands.Context, members: commands.Greedy[discord.Member], *, reason="no reason provided"):
         if not ctx.author.guild_permissions.manage_channels:
             await ctx.send("You do not have permission to manage channels.")
             return
+        if not members:
+            raise commands.MissingRequiredArgument(ctx.command.clean_params["members"])
+        members = list(dict.fromkeys(members))
     
         # Check if the jail setup is complete
-        jail_setup = await self._execute_query("SELECT * FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-        if not jail_setup:
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        if not config.jail_configured:
             await ctx.send(embed=discord.Embed(color=self.get_color('yellow'), description=f"{Emojis.warning} {ctx.author.mention} use `setme` command before using jail"))
             return
-    
-        if member.top_role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner.id:
-            embed = discord.Embed(
-                color=self.get_color('yellow'),
-                description=f"{Emojis.warning} {ctx.author.mention}: you cannot jail {member.mention} because they have a higher or equal role."
-            )
-            await ctx.send(embed=embed)
-            return
-    
-        already_jailed = await self._execute_query("SELECT * FROM jail WHERE guild_id = ? AND user_id = ?", (ctx.guild.id, member.id))
-        if already_jailed:
-            await ctx.send(embed=discord.Embed(color=self.get_color('yellow'), description=f"{Emojis.warning} {ctx.author.mention}: {member.mention} is already jailed"))
-            return
-    
-        roles_to_remove = [role for role in member.roles if not role.managed and not role.is_default()]
-        roles_json = json.dumps([role.id for role in roles_to_remove])
-    
-        await self._execute_query("INSERT INTO jail (guild_id, user_id, roles) VALUES (?, ?, ?)", (ctx.guild.id, member.id, roles_json))
-        await self._execute_commit()
-    
-        for role in roles_to_remove:
-            try:
-                await member.remove_roles(role)
-            except Exception as e:
-                logging.error(f"Failed to remove role {role.name}: {str(e)}")
-    
-        jail_role_id = jail_setup[0][1]  # Corrected to fetch the role ID correctly
-        jail_role = ctx.guild.get_role(jail_role_id)
-        if jail_role:
-            try:
-                await member.add_roles(jail_role, reason=f"jailed by {ctx.author} - {reason}")
-                success_embed = discord.Embed(color=self.get_color('green'), description=f"{Emojis.check} {member.mention} has been jailed - {reason}")
-                await ctx.send(embed=success_embed)
-    
-                # Send to jail-log channel
-                log_channel_id = jail_setup[0][3]  # Assuming the log_channel_id is the fourth element
-                log_channel = ctx.guild.get_channel(log_channel_id)
-                if log_channel:
-                    log_embed = discord.Embed(title="Modlog Entry", color=discord.Color.blue())
-                    log_embed.add_field(name="Information", value=f"Case #XXX | Jailed\nUser: {member} ({member.id})\nModerator: {ctx.author} ({ctx.author.id})\nReason: {reason}\nToday at {datetime.datetime.utcnow().strftime('%H:%M %p')} UTC", inline=False)
-                    await log_channel.send(embed=log_embed)
-            except Exception as e:
-                await ctx.send(embed=discord.Embed(color=self.get_color('red'), description=f"{ctx.author.mention} there was a problem jailing {member.mention}: {str(e)}"))
-        else:
+
+        jail_role = ctx.guild.get_role(config.jail_role_id)
+        if jail_role is None:
             logging.error("Jail role not found")
             await ctx.send("Jail role not found. Please check the configuration.")
-            
+            return
+
+        duration, reason = self.split_duration(reason)
+        reason = reason or "no reason provided"
+        unjail_time = datetime.datetime.now(datetime.timezone.utc) + duration if duration else None
 
-# Unjail command
+        async def jail_member(member):
+            if member.top_role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
+                raise commands.BadArgument(f"you cannot jail {member.mention} because they have a higher or equal role.")
+            if await self.bot.database.get_jailed(ctx.guild.id, member.id):
+                raise commands.BadArgument(f"{member.mention} is already jailed")
 
-    @commands.command(name="unjail")
+            # Roles the bot cannot manage stay on the member; everything else is swapped for the jail role
+            removed = [role for role in member.roles if self.can_assign(ctx.guild, role)]
+            kept = [role for role in member.roles if not role.is_default() and role not in removed]
+            await self.bot.database.add_jailed(ctx.guild.id, member.id, json.dumps([role.id for role in removed]))
+            try:
+                await self.replace_roles(member, kept + [jail_role], reason=f"jailed by {ctx.author} - {reason}")
+            except Exception:
+                # The jail role never landed and the member kept their roles, so there is nothing to restore later
+                await self.bot.database.remove_jailed(ctx.guild.id, member.id)
+                raise
+            if unjail_time:
+                await self.bot.timers.schedule("unjail", ctx.guild.id, member.id, unjail_time)
+            return True
+
+        # Member edits share one bucket per guild, so a few in flight are enough to keep it busy
+        result = await run_bulk(members, jail_member, concurrency=5)
+        jailed = [member for member in members if member not in {failed for failed, _ in result.failed}]
+        await self.send_jail_log(ctx.guild, config, "Jailed", jailed, ctx.author, reason)
+
+        length = f" for `{duration}`" if duration else ""
+        if len(members) == 1:
+            if result.failed:
+                error = result.failed[0][1]
+                color = 'yellow' if isinstance(error, commands.BadArgument) else 'red'
+                description = f"{Emojis.warning} {ctx.author.mention}: {error}" if color == 'yellow' else f"{ctx.author.mention} there was a problem jailing {members[0].mention}: {str(error)}"
+                return await ctx.send(embed=discord.Embed(color=self.get_color(color), description=description))
+            return await ctx.send(embed=discord.Embed(color=self.get_color('green'), description=f"{Emojis.check} {members[0].mention} has been jailed{length} - {reason}"))
+        await ctx.send(embed=self.bulk_summary(f"Jailed {len(jailed)} members{length} - {reason}", result))
+
+    @commands.command(name="unjail", usage="[members...]")
     @commands.has_permissions(manage_channels=True)
-    async def unjail(self, ctx, *, member_str: str):
+    async def unjail(self, ctx, members: commands.Greedy[discord.Member], *, member_str: str = None):
         if not ctx.author.guild_permissions.manage_channels:
             await ctx.send("You do not have permission to manage channels.")
             return
-    
-        # Convert the member input into a Member object
-        try:
-            member = await commands.MemberConverter().convert(ctx, member_str)
-        except commands.MemberNotFound:
-            await ctx.send(f"Member '{member_str}' not found.")
-            return
-    
-        # Check if the member is jailed
-        jailed_data = await self._execute_query("SELECT roles FROM jail WHERE guild_id = ? AND user_id = ?", (ctx.guild.id, member.id))
-        if not jailed_data:
-            await ctx.send(embed=discord.Embed(color=self.get_color('yellow'), description=f"{Emojis.warning} {ctx.author.mention}: {member.mention} is not currently jailed."))
+        if member_str or not members:
+            await ctx.send(f"Member '{member_str or ''}' not found.")
             return
-    
-        # Parse the roles JSON from the database
-        original_roles_ids = json.loads(jailed_data[0][0])
-        original_roles = [ctx.guild.get_role(role_id) for role_id in original_roles_ids if ctx.guild.get_role(role_id)]
-    
-        # Remove the jail role
-        jail_setup = await self._execute_query("SELECT role_id FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-        if jail_setup:
-            jail_role = ctx.guild.get_role(jail_setup[0][0])
-            if jail_role in member.roles:
-                await member.remove_roles(jail_role)
-    
-        # Restore original roles
-        try:
-            await member.add_roles(*original_roles, reason="unjailing")
-            success_embed = discord.Embed(color=self.get_color('green'), description=f"{Emojis.check} {member.mention} has been unjailed and their original roles restored.")
-            await ctx.send(embed=success_embed)
-    
-            # Send to jail-log channel
-            log_channel_id = await self._execute_query("SELECT log_channel_id FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-            if log_channel_id:
-                log_channel = ctx.guild.get_channel(log_channel_id[0][0])
-                if log_channel:
-                    log_embed = discord.Embed(title="Modlog Entry", color=discord.Color.blue())
-                    log_embed.add_field(name="Information", value=f"Case #XXX | Unjailed\nUser: {member} ({member.id})\nModerator: {ctx.author} ({ctx.author.id})\nToday at {datetime.datetime.utcnow().strftime('%H:%M %p')} UTC", inline=False)
-                    await log_channel.send(embed=log_embed)
-        except Exception as e:
-            await ctx.send(embed=discord.Embed(color=self.get_color('red'), description=f"Failed to restore roles to {member.mention}: {str(e)}"))
-    
-        # Remove the jail record from the database
-        await self._execute_query("DELETE FROM jail WHERE guild_id = ? AND user_id = ?", (ctx.guild.id, member.id))
-        await self._execute_commit()
+        members = list(dict.fromkeys(members))
+
+        async def unjail_member(member):
+            jailed_data = await self.bot.database.get_jailed(ctx.guild.id, member.id)
+            if not jailed_data:
+                raise commands.BadArgument(f"{member.mention} is not currently jailed.")
+            await self.release_from_jail(ctx.guild, member, jailed_data, ctx.author, log=False)
+            return True
+
+        result = await run_bulk(members, unjail_member, concurrency=5)
+        released = [member for member in members if member not in {failed for failed, _ in result.failed}]
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        await self.send_jail_log(ctx.guild, config, "Unjailed", released, ctx.author)
+
+        if len(members) == 1:
+            if result.failed:
+                error = result.failed[0][1]
+                if isinstance(error, commands.BadArgument):
+                    return await ctx.send(embed=discord.Embed(color=self.get_color('yellow'), description=f"{Emojis.warning} {ctx.author.mention}: {error}"))
+                return await ctx.send(embed=discord.Embed(color=self.get_color('red'), description=f"Failed to restore roles to {members[0].mention}: {str(error)}"))
+            return await ctx.send(embed=discord.Embed(color=self.get_color('green'), description=f"{Emojis.check} {members[0].mention} has been unjailed and their original roles restored."))
+        await ctx.send(embed=self.bulk_summary(f"Unjailed {len(released)} members and restored their roles.", result))
+
+    def bulk_summary(self, headline, result):
+        """Summarise a multi-member jail or unjail, listing up to ten members that were skipped."""
+        if not result.failed:
+            return discord.Embed(color=self.get_color('green'), description=f"{Emojis.check} {headline}")
+        skipped = "\n".join(f"{member.mention}: {error}" for member, error in result.failed[:10])
+        more = f"\n...and {len(result.failed) - 10} more" if len(result.failed) > 10 else ""
+        return discord.Embed(color=self.get_color('yellow'), description=f"{Emojis.warning} {headline}\n{len(result.failed)} skipped:\n{skipped}{more}")
+
+    async def release_from_jail(self, guild, member, record, moderator, reason="unjailing", log=True):
+        """Swap the jail role for the member's saved roles in one edit, log it and drop the jail record and timer.
+
+        If the roles can't be restored this raises and leaves the record and timer alone.
+        """
+        config = await self.bot.get_guild_config(guild.id)
+        jail_role = guild.get_role(config.jail_role_id) if config.jail_configured else None
+        restored = [role for role in map(guild.get_role, json.loads(record.roles)) if role and self.can_assign(guild, role)]
+        kept = [role for role in member.roles if not role.is_default() and role != jail_role]
+        await self.replace_roles(member, kept + restored, reason=reason)
+        # Only once the saved roles are back is the record safe to drop
+        await self.bot.database.remove_jailed(guild.id, member.id)
+        await self.bot.timers.cancel("unjail", guild.id, member.id)
+        if log:
+            await self.send_jail_log(guild, config, "Unjailed", [member], moderator)
 
 
 # Setme and unsetme commands
@@ -557,47 +999,108 @@ class Moderation(commands.Cog):
 
     @commands.command(help="set the jail module", description="config")
     @commands.cooldown(1, 6, commands.BucketType.guild)
+    @commands.max_concurrency(1, per=commands.BucketType.guild)
     async def setme(self, ctx: commands.Context):
         if not ctx.author.guild_permissions.administrator:
             await ctx.send("You do not have administrator permissions.")
             return
     
         await ctx.message.channel.typing()
-        async with ctx.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT * FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-            res = await cursor.fetchone()
-            if res is not None:
-                return await ctx.send(embed=discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: Jail is already set"))
-    
-            # Create the jail role
-            role = await ctx.guild.create_role(name="jail", color=0xff0000)
-    
-            # Create the jail channel with specific permissions
+        guild = ctx.guild
+        config = await self.bot.get_guild_config(guild.id)
+        if config.jail_configured and config.jail_provisioned:
+            return await ctx.send(embed=discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: Jail is already set"))
+
+        # A previous run that stopped partway left its role and channels behind; reuse them
+        role = guild.get_role(config.jail_role_id) if config.jail_configured else None
+        if role is None:
+            role = await guild.create_role(name="jail", color=0xff0000)
+
+        # Create the jail channel with specific permissions
+        jail_channel = guild.get_channel(config.jail_channel_id) if config.jail_configured else None
+        if jail_channel is None:
             overwrites_jail = {
-                ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
                 role: discord.PermissionOverwrite(read_messages=True)
             }
-            jail_channel = await ctx.guild.create_text_channel('jail', overwrites=overwrites_jail)
-    
-            # Create the jail-log channel
+            jail_channel = await guild.create_text_channel('jail', overwrites=overwrites_jail)
+
+        # Create the jail-log channel
+        jail_log_channel = guild.get_channel(config.jail_log_channel_id) if config.jail_configured else None
+        if jail_log_channel is None:
             overwrites_log = {
-                ctx.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
                 role: discord.PermissionOverwrite(read_messages=False)  # Jail role should not see this channel
             }
-            jail_log_channel = await ctx.guild.create_text_channel('jail-log', overwrites=overwrites_log)
-    
-            # Apply role permissions to all other channels
-            for channel in ctx.guild.channels:
-                if isinstance(channel, discord.TextChannel):
-                    await channel.set_permissions(role, read_messages=False, read_message_history=False)
-                elif isinstance(channel, discord.VoiceChannel):
-                    await channel.set_permissions(role, connect=False)
-    
-            # Save the role and channel ID to the database
-            await cursor.execute("INSERT INTO setme (channel_id, role_id, guild_id, log_channel_id) VALUES (?, ?, ?, ?)", (jail_channel.id, role.id, ctx.guild.id, jail_log_channel.id))
-            await ctx.bot.db.commit()
-            embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {ctx.author.mention} jail set")
-            await ctx.send(embed=embed)
+            jail_log_channel = await guild.create_text_channel('jail-log', overwrites=overwrites_log)
+
+        # Save the setup before touching the other channels, so running setme again finishes the rest
+        await self.bot.database.add_jail_setup(guild.id, jail_channel.id, role.id, jail_log_channel.id, provisioned=False)
+        config.set_jail(JailSetup(jail_channel.id, role.id, guild.id, jail_log_channel.id, False))
+        self.bot.publish("guild_config", guild_id=guild.id)
+
+        channels = self.jail_targets(guild, role)
+        message = await ctx.send(embed=discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: Applying jail permissions to {len(channels)} channels..."))
+
+        async def progress(result):
+            if result.finished is None:
+                await message.edit(embed=discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: Applied jail permissions to {result.done}/{result.total} channels..."))
+
+        # Channels that already have the jail overwrite are skipped without an API call
+        result = await run_bulk(channels, self.jail_overwrite(role, reason="Jail setup"), concurrency=8, progress=progress)
+        if result.failed:
+            failures = "\n".join(f"{channel.mention}: {error}" for channel, error in result.failed[:10])
+            embed = discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: {len(result.failed)} channels could not be updated. Fix the permissions and run setme again to finish:\n{failures}")
+            return await message.edit(embed=embed)
+
+        await self.bot.database.set_jail_provisioned(guild.id)
+        config.jail_provisioned = True
+        self.bot.publish("guild_config", guild_id=guild.id)
+        embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {ctx.author.mention} jail set ({result.changed} channels updated, {result.skipped} already set)")
+        await message.edit(embed=embed)
+
+    @staticmethod
+    def is_jail_target(channel, role):
+        """Whether the jail role should be shut out of `channel`. Channels that explicitly let it in, like the jail itself, are left alone."""
+        return isinstance(channel, (discord.TextChannel, discord.VoiceChannel)) and channel.overwrites_for(role).read_messages is not True
+
+    def jail_targets(self, guild, role):
+        return [channel for channel in guild.channels if self.is_jail_target(channel, role)]
+
+    @staticmethod
+    def jail_overwrite(role, reason=None):
+        """Return a bulk worker that hides text channels and blocks voice channels for the jail role."""
+        hide = edit_overwrite(role, reason=reason, read_messages=False, read_message_history=False)
+        block = edit_overwrite(role, reason=reason, connect=False)
+
+        async def worker(channel):
+            if isinstance(channel, discord.VoiceChannel):
+                return await block(channel)
+            return await hide(channel)
+        return worker
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        """Drop the mass unban checkpoint once the bot has actually left the guild."""
+        progress = self.unban_jobs.get(guild.id)
+        if progress is not None:
+            progress.task.cancel()
+            await asyncio.gather(progress.task, return_exceptions=True)  # So no checkpoint lands after the delete
+        await self.bot.database.delete_unban_job(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Give channels created after setme the jail overwrite."""
+        config = await self.bot.get_guild_config(channel.guild.id)
+        if not config.jail_configured:
+            return
+        role = channel.guild.get_role(config.jail_role_id)
+        if role is None or not self.is_jail_target(channel, role):
+            return
+        try:
+            await self.jail_overwrite(role, reason="Jail setup for new channel")(channel)
+        except discord.HTTPException as e:
+            logging.error(f"Could not apply jail overwrite to channel {channel.id} in guild {channel.guild.id}: {e}")
     
     
     @commands.command()
@@ -607,67 +1110,53 @@ class Moderation(commands.Cog):
             await ctx.send("You do not have administrator permissions.")
             return
 
-        async with ctx.bot.db.cursor() as cursor:
-            await cursor.execute("SELECT * FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-            check = await cursor.fetchone()
-            if check is None:
-                em = discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: jail module is not set")
-                await ctx.send(embed=em)
-                return
-
-            button1 = Button(label="Yes", style=discord.ButtonStyle.green)
-            button2 = Button(label="No", style=discord.ButtonStyle.red)
-            embed = discord.Embed(color=Colors.default, description=f"{ctx.author.mention} are you sure you want to clear the jail module?")
-
-            async def button1_callback(interaction: discord.Interaction):
-                if interaction.user != ctx.author:
-                    emb = discord.Embed(color=Colors.red, description=f"{Emojis.wrong} {interaction.user.mention}: this is not your message")
-                    await interaction.response.send_message(embed=emb, ephemeral=True)
-                    return
-                async with ctx.bot.db.cursor() as cursor:
-                    await cursor.execute("SELECT * FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-                    check = await cursor.fetchone()
-                    channel_id = check[0]
-                    role_id = check[1]
-                    log_channel_id = check[3]  # Assuming log_channel_id is the fourth column in your setme table
-
-                    channel = ctx.guild.get_channel(channel_id)
-                    role = ctx.guild.get_role(role_id)
-                    log_channel = ctx.guild.get_channel(log_channel_id)
-
-                    try:
-                        if role:
-                            await role.delete()
-                        if channel:
-                            await channel.delete()
-                        if log_channel:
-                            await log_channel.delete()
-                    except Exception as e:
-                        await interaction.response.send_message(f"Failed to delete jail setup: {e}", ephemeral=True)
-                        return
-
-                    await cursor.execute("DELETE FROM setme WHERE guild_id = ?", (ctx.guild.id,))
-                    await ctx.bot.db.commit()
-                    embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {ctx.author.mention}: jail module has been cleared")
-                    await interaction.response.edit_message(embed=embed, view=None)
-
-            button1.callback = button1_callback
-
-            async def button2_callback(interaction: discord.Interaction):
-                if interaction.user != ctx.author:
-                    emb = discord.Embed(color=Colors.red, description=f"{Emojis.wrong} {interaction.user.mention}: this is not your message")
-                    await interaction.response.send_message(embed=emb, ephemeral=True)
-                    return
-
-                embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {ctx.author.mention}: you have changed your mind")
-                await interaction.response.edit_message(embed=embed, view=None)
-
-            button2.callback = button2_callback
-
-            view = View()
-            view.add_item(button1)
-            view.add_item(button2)
-            await ctx.send(embed=embed, view=view)
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        if not config.jail_configured:
+            em = discord.Embed(color=Colors.yellow, description=f"{Emojis.warning} {ctx.author.mention}: jail module is not set")
+            await ctx.send(embed=em)
+            return
+
+        embed = discord.Embed(color=Colors.default, description=f"{ctx.author.mention} are you sure you want to clear the jail module?")
+        view = View(timeout=None)
+        view.add_item(Button(label="Yes", style=discord.ButtonStyle.green, custom_id=ComponentRouter.custom_id("unsetme", "yes", ctx.author.id)))
+        view.add_item(Button(label="No", style=discord.ButtonStyle.red, custom_id=ComponentRouter.custom_id("unsetme", "no", ctx.author.id)))
+        await ctx.send(embed=embed, view=ComponentRouter.detach(view))
+
+    async def unsetme_confirm(self, interaction: discord.Interaction, args):
+        """ComponentRouter handler for the unsetme Yes/No buttons."""
+        choice, author_id = args[0], int(args[1])
+        if interaction.user.id != author_id:
+            emb = discord.Embed(color=Colors.red, description=f"{Emojis.wrong} {interaction.user.mention}: this is not your message")
+            await interaction.response.send_message(embed=emb, ephemeral=True)
+            return
+
+        if choice == "no":
+            embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {interaction.user.mention}: you have changed your mind")
+            await interaction.response.edit_message(embed=embed, view=None)
+            return
+
+        guild = interaction.guild
+        config = await self.bot.get_guild_config(guild.id)
+        channel = guild.get_channel(config.jail_channel_id)
+        role = guild.get_role(config.jail_role_id)
+        log_channel = guild.get_channel(config.jail_log_channel_id)
+
+        try:
+            if role:
+                await role.delete()
+            if channel:
+                await channel.delete()
+            if log_channel:
+                await log_channel.delete()
+        except Exception as e:
+            await interaction.response.send_message(f"Failed to delete jail setup: {e}", ephemeral=True)
+            return
+
+        await self.bot.database.delete_jail_setup(guild.id)
+        config.clear_jail()
+        self.bot.publish("guild_config", guild_id=guild.id)
+        embed = discord.Embed(color=Colors.green, description=f"{Emojis.check} {interaction.user.mention}: jail module has been cleared")
+        await interaction.response.edit_message(embed=embed, view=None)
 
 
 #warn command
@@ -696,10 +1185,7 @@ class Moderation(commands.Cog):
 
         try:
             # Save warning to the database
-            async with aiosqlite.connect('database/database.db') as db:
-                await db.execute("INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
-                                 (str(ctx.guild.id), str(member.id), str(ctx.author.id), reason))
-                await db.commit()
+            await self.bot.database.add_warn(member.id, ctx.guild.id, ctx.author.id, reason)
 
             # Send warning message within the guild if bot cannot send a direct message
             if not member.dm_channel:
@@ -726,24 +1212,33 @@ class Moderation(commands.Cog):
             return
 
         try:
-            async with aiosqlite.connect('database/database.db') as db:
-                async with db.execute("SELECT reason FROM warnings WHERE guild_id = ? AND user_id = ?",
-                                      (str(ctx.guild.id), str(member.id))) as cursor:
-                    warnings = await cursor.fetchall()
-
-            if warnings:
-                # Extract reasons from tuples and format them as strings with block quote formatting
-                formatted_warnings = [f"> {reason[0]}" for reason in warnings]
-                warning_list = "\n".join(formatted_warnings)
-                embed = discord.Embed(description=f"**Warnings for {member.display_name}:**\n{warning_list}", color=Colors.default)
-                await ctx.send(embed=embed)
-            else:
+            if not await self.bot.paginator.send(ctx, "warn", member.id, ctx.guild):
                 embed = discord.Embed(description=f"{Emojis.warning} No warnings found for `{member.display_name}`.", color=Colors.yellow)
                 await ctx.send(embed=embed)
         except Exception as e:
             print(f"Error fetching warnings: {e}")
             await ctx.send("An error occurred while fetching warnings.")
 
+    async def warnings_page(self, guild, user_id, direction, cursor, per_page=10):
+        """Paginator source for `warnings`: keyset pages over the warning ids."""
+        if direction == "p":
+            warnings = await self.bot.database.get_warnings_page(user_id, guild.id, before=cursor, limit=per_page + 1)
+            has_prev, has_next = len(warnings) > per_page, True
+            warnings = warnings[-per_page:]
+        else:
+            warnings = await self.bot.database.get_warnings_page(user_id, guild.id, after=cursor or 0, limit=per_page + 1)
+            has_prev, has_next = direction == "n", len(warnings) > per_page
+            warnings = warnings[:per_page]
+        if not warnings:
+            return None
+        total = await self.bot.database.count_warnings(user_id, guild.id)
+        member = self.bot.chunker.get_member(guild, user_id)
+        lines = [f"> `#{warning.id}` {discord.utils.escape_markdown(warning.reason or '')[:300]}" for warning in warnings]
+        return Page(
+            f"Warnings for {member.display_name if member else user_id}", lines,
+            warnings[0].id, warnings[-1].id, has_prev, has_next, -(-total // per_page)
+        )
+
     @commands.command(name="clearwarnings", aliases=["clearwarns"], description="Clears all warnings for the mentioned user.")
     @commands.has_permissions(manage_messages=True)
     async def clear_warnings(self, ctx, member: discord.Member = None):
@@ -754,10 +1249,7 @@ class Moderation(commands.Cog):
             return
         
         try:
-            async with aiosqlite.connect('database/database.db') as db:
-                await db.execute("DELETE FROM warnings WHERE guild_id = ? AND user_id = ?",
-                                 (str(ctx.guild.id), str(member.id)))
-                await db.commit()
+            await self.bot.database.clear_warnings(member.id, ctx.guild.id)
             
             embed = discord.Embed(description=f"{Emojis.check} Warnings cleared for {member.display_name}.", color=Colors.green)
             await ctx.send(embed=embed)
@@ -801,13 +1293,19 @@ class Moderation(commands.Cog):
                     "Example: !role icon Role (icon_url)\n"
                     "Example: !role position @Role (position)\n"
                     "Example: !role add @Member @Role\n"
-                    "Example: !role remove @Member @Role```"
+                    "Example: !role add humans @Role\n"
+                    "Example: !role add in:@Staff @Role\n"
+                    "Example: !role remove joined:2024-01-31 @Role\n"
+                    "Example: !role remove @Member @Role\n"
+                    "Example: !role status\n"
+                    "Example: !role cancel```"
                 ),
                 inline=False
             )
             await ctx.send(embed=embed)
     
     @role_group.command(name="create", description="Creates a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_create(self, ctx, *role_name):
         """Creates a role."""
         role_name = " ".join(role_name)
@@ -819,6 +1317,7 @@ class Moderation(commands.Cog):
             await self.send_error_embed(ctx, str(e))
     
     @role_group.command(name="rename", description="Renames a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_rename(self, ctx, role: discord.Role, new_name: str):
         """Renames a role."""
         try:
@@ -829,6 +1328,7 @@ class Moderation(commands.Cog):
             await self.send_error_embed(ctx, str(e))
     
     @role_group.command(name="delete", description="Deletes a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_delete(self, ctx, role: discord.Role):
         """Deletes a role."""
         try:
@@ -838,9 +1338,12 @@ class Moderation(commands.Cog):
         except Exception as e:
             await self.send_error_embed(ctx, str(e))
     
-    @role_group.command(name="add", description="Adds a role to a member.", case_insensitive=True)
-    async def role_add(self, ctx, member: discord.Member, role: discord.Role):
-        """Adds a role to a member."""
+    @role_group.command(name="add", description="Adds a role to a member, or to everyone a selector matches.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
+    async def role_add(self, ctx, member: MemberSelector, role: discord.Role):
+        """Adds a role to a member. `humans`, `bots`, `all`, `in:<role>` or `joined:<date>` start a bulk job instead."""
+        if isinstance(member, RoleSelection):
+            return await self.start_role_job(ctx, member, role, add=True)
         try:
             if role in member.roles:
                 embed = discord.Embed(description=f"{Emojis.warning} {member.display_name} already has the role {role.name}.", color=Colors.yellow)
@@ -852,9 +1355,12 @@ class Moderation(commands.Cog):
         except Exception as e:
             await self.send_error_embed(ctx, str(e))
     
-    @role_group.command(name="remove", description="Removes a role from a member.", case_insensitive=True)
-    async def role_remove(self, ctx, member: discord.Member, role: discord.Role):
-        """Removes a role from a member."""
+    @role_group.command(name="remove", description="Removes a role from a member, or from everyone a selector matches.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
+    async def role_remove(self, ctx, member: MemberSelector, role: discord.Role):
+        """Removes a role from a member. `humans`, `bots`, `all`, `in:<role>` or `joined:<date>` start a bulk job instead."""
+        if isinstance(member, RoleSelection):
+            return await self.start_role_job(ctx, member, role, add=False)
         try:
             if role not in member.roles:
                 embed = discord.Embed(description=f"{Emojis.warning} {member.display_name} does not have the role {role.name}.", color=Colors.yellow)
@@ -865,8 +1371,78 @@ class Moderation(commands.Cog):
                 await ctx.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(ctx, str(e))
-    
+
+    @role_group.command(name="status", description="Shows the progress of the running bulk role job.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
+    async def role_status(self, ctx):
+        """Shows the progress of the running bulk role job."""
+        job = self.role_jobs.get(ctx.guild.id)
+        if job is None:
+            embed = discord.Embed(description=f"{Emojis.warning} No bulk role job is running.", color=Colors.yellow)
+            return await ctx.send(embed=embed)
+        await ctx.send(embed=job.embed())
+
+    @role_group.command(name="cancel", description="Cancels the running bulk role job.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
+    async def role_cancel(self, ctx):
+        """Cancels the running bulk role job. Members already changed keep the change."""
+        job = self.role_jobs.get(ctx.guild.id)
+        if job is None:
+            embed = discord.Embed(description=f"{Emojis.warning} No bulk role job is running.", color=Colors.yellow)
+            return await ctx.send(embed=embed)
+        job.task.cancel()
+        embed = discord.Embed(description=f"{Emojis.check} Cancelled the bulk role job after {job.result.done}/{job.result.total} members.", color=Colors.green)
+        await ctx.send(embed=embed)
+
+    async def start_role_job(self, ctx, selection, role, *, add):
+        """Add or remove `role` for every member `selection` matches, as a cancellable background job."""
+        if ctx.guild.id in self.role_jobs:
+            embed = discord.Embed(description=f"{Emojis.warning} A bulk role job is already running. Use `role status` or `role cancel`.", color=Colors.yellow)
+            return await ctx.send(embed=embed)
+        if role.is_default() or role.managed or role >= ctx.guild.me.top_role:
+            return await self.send_error_embed(ctx, f"I can't assign {role.name}; it is managed or above my highest role.")
+        if role >= ctx.author.top_role and ctx.author != ctx.guild.owner:
+            return await self.send_error_embed(ctx, f"You can't assign {role.name}; it is not below your highest role.")
+        # Only members whose roles would actually change are queued
+        if await self.bot.chunker.ensure(ctx.guild):
+            candidates = self.bot.role_index.members(ctx.guild, selection.role) if selection.role else ctx.guild.members
+        else:
+            candidates = await self.bot.chunker.members(ctx.guild)
+        members = [
+            member for member in candidates
+            if selection.matches(member) and (role in member.roles) != add
+        ]
+        if not members:
+            embed = discord.Embed(description=f"{Emojis.warning} Nothing to do: all {selection.description} already {'have' if add else 'lack'} {role.name}.", color=Colors.yellow)
+            return await ctx.send(embed=embed)
+
+        job = RoleJob(f"{'Adding' if add else 'Removing'} {role.name} {'to' if add else 'from'} {selection.description}", BulkResult(len(members)))
+        job.message = await ctx.send(embed=job.embed())
+        reason = f"Bulk role {'add' if add else 'remove'} by {ctx.author}"
+
+        async def change(member):
+            if (role in member.roles) == add:
+                return False  # Changed by someone else since the job was queued
+            if add:
+                await member.add_roles(role, reason=reason)
+            else:
+                await member.remove_roles(role, reason=reason)
+            return True
+
+        async def run():
+            try:
+                # Member edits share one bucket per guild; a few requests in flight keep it saturated
+                await run_bulk(members, change, concurrency=5, progress=job.report, interval=3, result=job.result)
+            except asyncio.CancelledError:
+                job.cancelled = True
+            await job.report()
+
+        job.task = asyncio.create_task(run(), name=f"role-job-{ctx.guild.id}")
+        self.role_jobs[ctx.guild.id] = job
+        job.task.add_done_callback(lambda _: self.role_jobs.pop(ctx.guild.id, None))
+
     @role_group.command(name="color", description="Changes the color of a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_color(self, ctx, role: discord.Role, color: discord.Color):
         """Changes the color of a role."""
         try:
@@ -877,6 +1453,7 @@ class Moderation(commands.Cog):
             await self.send_error_embed(ctx, str(e))
     
     @role_group.command(name="mentionable", description="Changes the mentionability of a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_mentionable(self, ctx, role: discord.Role):
         """Changes the mentionability of a role."""
         try:
@@ -887,6 +1464,7 @@ class Moderation(commands.Cog):
             await self.send_error_embed(ctx, str(e))
     
     @role_group.command(name="icon", description="Changes the icon of a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_icon(self, ctx, role: discord.Role, icon_url: str):
         """Changes the icon of a role."""
         try:
@@ -897,6 +1475,7 @@ class Moderation(commands.Cog):
             await self.send_error_embed(ctx, str(e))
     
     @role_group.command(name="position", description="Changes the position of a role.", case_insensitive=True)
+    @commands.has_permissions(manage_roles=True)
     async def role_position(self, ctx, role: discord.Role, position: int):
         """Changes the position of a role."""
         try:
@@ -915,23 +1494,35 @@ class Moderation(commands.Cog):
     @commands.command(name="inrole", description="Lists all members in the specified role.")
     async def inrole(self, ctx, *, role_name: str):
         """Lists all members in a role."""
-        role_name = role_name.lower()
-        role = discord.utils.find(lambda r: r.name.lower() == role_name, ctx.guild.roles)
+        await self.bot.chunker.ensure(ctx.guild)  # Before the role index is first built from the member cache
+        role = self.bot.role_index.find_role(ctx.guild, role_name)
         
         if role is None:
             embed = discord.Embed(description=f"{Emojis.warning} An error occurred: Role \"{role_name}\" not found.", color=Colors.red)
             await ctx.send(embed=embed)
             return
 
-        members = [member for member in ctx.guild.members if role in member.roles]
-        if not members:
+        if not await self.bot.paginator.send(ctx, "inrole", role.id, ctx.guild):
             embed = discord.Embed(description=f"{Emojis.warning} No members found in the role {role.name}.", color=Colors.red)
             await ctx.send(embed=embed)
-            return
 
-        view = RoleMembersView(ctx, role, members)
-        embed = view.create_embed()
-        view.message = await ctx.send(embed=embed, view=view)
+    async def inrole_page(self, guild, role_id, direction, cursor, per_page=10):
+        """Paginator source for `inrole`: pages over the role index, ordered by member id."""
+        role = guild.get_role(role_id)
+        if role is None:
+            return None
+        if await self.bot.chunker.ensure(guild):
+            member_ids = sorted(self.bot.role_index.member_ids(guild, role))
+        else:
+            member_ids = sorted(member.id for member in await self.bot.chunker.members(guild) if role in member.roles)
+        start, page_ids, has_prev, has_next = slice_page(member_ids, direction, cursor, per_page)
+        if not page_ids:
+            return None
+        lines = []
+        for position, member_id in enumerate(page_ids, start=start + 1):
+            member = self.bot.chunker.get_member(guild, member_id)
+            lines.append(f"{position}. {discord.utils.escape_markdown(member.display_name) if member else member_id}")
+        return Page(f"Members in {role.name}", lines, page_ids[0], page_ids[-1], has_prev, has_next, -(-len(member_ids) // per_page))
 
     async def send_error_embed(self, ctx, error_message):
         """Send an error embed with the provided message."""
@@ -950,12 +1541,21 @@ class Moderation(commands.Cog):
 
     @commands.command(name="setlimit", description="Sets the message limit for a specific channel.")
     @commands.has_permissions(manage_messages=True)
-    async def setlimit(self, ctx, channel: discord.TextChannel, limit: int):
-        """Sets the message limit for a specific channel."""
-        self.message_limits[channel.id] = limit
-        # Ensure message counts are reset when setting a new limit
-        self.message_counts[channel.id] = defaultdict(int)
-        embed = discord.Embed(description=f"{Emojis.check} Set message limit of {limit} messages per person for {channel.mention}.", color=Colors.green)
+    async def setlimit(self, ctx, channel: discord.TextChannel, limit: int, window: str = "60s"):
+        """Sets the message limit for a specific channel, e.g. `setlimit #general 5 30s`."""
+        duration = parse_duration(window)
+        if limit < 1 or duration is None:
+            embed = discord.Embed(description=f"{Emojis.warning} Please give a positive limit and a window such as `30s`, `5m` or `1h`.", color=Colors.yellow)
+            await ctx.send(embed=embed)
+            return
+        window_seconds = int(duration.total_seconds())
+        message_limit = await self.bot.database.set_message_limit(ctx.guild.id, channel.id, limit, window_seconds)
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        config.message_limits[channel.id] = message_limit
+        self.bot.publish("guild_config", guild_id=ctx.guild.id)
+        # Start everyone in this channel from a clean window under the new limit
+        self.bot.message_limiter.reset_channel(channel.id)
+        embed = discord.Embed(description=f"{Emojis.check} Set message limit of {limit} messages per person every {window_seconds} seconds for {channel.mention}.", color=Colors.green)
         await ctx.send(embed=embed)
     
     @commands.Cog.listener()
@@ -963,43 +1563,31 @@ class Moderation(commands.Cog):
         if message.author.bot or not message.guild:
             return
     
-        channel_id = message.channel.id
-        user_id = message.author.id
-    
-        # Increment message count
-        self.message_counts[channel_id][user_id] += 1
+        config = self.bot.guild_configs.cached(message.guild.id)
+        if config is None:
+            config = await self.bot.get_guild_config(message.guild.id)
+        limit = config.message_limits.get(message.channel.id)
+        if limit is None:
+            return
     
-        # Check if the user has exceeded the limit
-        if channel_id in self.message_limits and self.message_counts[channel_id][user_id] > self.message_limits[channel_id]:
+        if not self.bot.message_limiter.hit(message.channel.id, message.author.id, limit.max_messages, limit.window_seconds):
             await message.delete()
             embed = discord.Embed(description=f"{Emojis.warning} {message.author.mention}, you have exceeded the message limit for this channel.", color=Colors.red)
             await message.channel.send(embed=embed, delete_after=5)
-        else:
-            # Reset message count after the time frame
-            if user_id not in self.reset_tasks[channel_id]:
-                self.reset_tasks[channel_id][user_id] = self.bot.loop.create_task(self.reset_message_count(channel_id, user_id))
-    
-    async def reset_message_count(self, channel_id, user_id):
-        await asyncio.sleep(self.time_frame)
-        self.message_counts[channel_id][user_id] = 0
-        del self.reset_tasks[channel_id][user_id]
 
     @commands.command(name="resetlimit", description="Resets the message limit for a specific channel.")
     @commands.has_permissions(manage_messages=True)
     async def resetlimit(self, ctx, channel: discord.TextChannel):
         """Resets the message limit and message counts for a specific channel."""
-        if channel.id in self.message_limits:
-            del self.message_limits[channel.id]  # Remove the limit for the channel
-        # Reset message counts for all users in this channel
-        self.message_counts[channel.id] = defaultdict(int)
-        # Cancel and remove any reset tasks for this channel
-        if channel.id in self.reset_tasks:
-            for task in self.reset_tasks[channel.id].values():
-                task.cancel()
-            del self.reset_tasks[channel.id]
+        config = await self.bot.get_guild_config(ctx.guild.id)
+        if channel.id in config.message_limits:
+            await self.bot.database.delete_message_limit(channel.id)
+            del config.message_limits[channel.id]  # Remove the limit for the channel
+            self.bot.publish("guild_config", guild_id=ctx.guild.id)
+        # Forget every user's window in this channel
+        self.bot.message_limiter.reset_channel(channel.id)
         embed = discord.Embed(description=f"{Emojis.check} Reset message limit and counts for {channel.mention}.", color=Colors.green)
         await ctx.send(embed=embed)
 
-
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
@@ -2,6 +2,7 @@ import discord
 import datetime
 from discord.ext import commands
 from backend.classes import Colors, Emojis
+from backend.dispatch import Priority
 
 async def noperms(self, ctx, permission):
     e = discord.Embed(color=Colors.yellow, description=f"> {Emojis.warning} {ctx.author.mention}: you are missing permission `{permission}`")
@@ -24,7 +25,7 @@ class Events(commands.Cog, name="events"):
         message = self.bot.get_channel(1229643685981978664)
         embed = discord.Embed(color=Colors.default, title=f"**restarted**", description=f"> placeholder online - back online")
         embed.set_footer(text="connected to discord API")    
-        await message.send(embed=embed)
+        await self.bot.rest.send(message, route="restart_notice", priority=Priority.COSMETIC, key=message.id, guild_id=message.guild.id, shed=True, embed=embed)
 
 
     # Include other event handlers and methods as necessary
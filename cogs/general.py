@@ -1,10 +1,9 @@
 import discord
-import pytz
-import aiosqlite
 from typing import Union
 from discord.ext import commands
 from datetime import datetime, timezone
 from backend.classes import Colors, Emojis
+from backend.members import GuildStats
 
 class General(commands.Cog, name="General"):
     def __init__(self, bot):
@@ -13,7 +12,10 @@ class General(commands.Cog, name="General"):
     @commands.command(name="serverinfo", aliases=["si", "server", "guildinfo"], help="Displays information about the server.")
     async def server_info(self, ctx):
         guild = ctx.guild
-        await guild.chunk()  # Ensure the guild cache is fully populated
+        if await self.bot.chunker.ensure(guild):
+            stats = self.bot.guild_stats.get(guild)  # Member events keep these current from here on
+        else:
+            stats = GuildStats.from_members(await self.bot.chunker.members(guild))
 
         embed = discord.Embed(title=guild.name, color=Colors.default)  
         embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
@@ -22,19 +24,13 @@ class General(commands.Cog, name="General"):
         months_since_creation = (datetime.now(timezone.utc) - guild.created_at).days // 30
         embed.add_field(name="Server created on", value=f"```{created_at} ({months_since_creation} months ago)```", inline=False)
 
-        owner_name = "Owner not available"
-        try:
-            owner = await guild.fetch_member(guild.owner_id)
-            owner_name = owner.name if owner else "Owner not available"
-        except:
-            pass
+        owner = guild.owner or await self.bot.chunker.fetch_member(guild, guild.owner_id)  # Rarely cached outside the full profile
+        owner_name = owner.name if owner else "Owner not available"
         embed.add_field(name="Owner", value=f"```{owner_name}```", inline=True)
 
-        human_count = sum(1 for member in guild.members if not member.bot)
-        bot_count = sum(1 for member in guild.members if member.bot)
-        members_info = f"Total: {guild.member_count}\nHumans: {human_count}\nBots: {bot_count}"
+        members_info = f"Total: {guild.member_count}\nHumans: {stats.humans}\nBots: {stats.bots}"
         verification_boosts = f"Verification: {str(guild.verification_level).title()}\nServer Boosts: {guild.premium_subscription_count} (level {guild.premium_tier})"
-        counts_info = f"Roles: {len(guild.roles)}/250\nEmojis: {len(guild.emojis)}/500\nBoosters: {len(guild.premium_subscribers)}"
+        counts_info = f"Roles: {len(guild.roles)}/250\nEmojis: {len(guild.emojis)}/500\nBoosters: {stats.boosters}"
         
         embed.add_field(name="Members", value=f"```{members_info}```", inline=True)
         embed.add_field(name="Information", value=f"```{verification_boosts}```", inline=True)
@@ -1,8 +1,8 @@
 import discord
 from discord.ext import commands
 import datetime
-import aiosqlite
 from backend.classes import Colors, Emojis
+from backend.profiles import format_memory, memory_mb
 
 # Function to format timedelta into a human-readable string
 def format_timedelta(td: datetime.timedelta) -> str:
@@ -149,9 +149,146 @@ class Owner(commands.Cog):
         
         await ctx.send(embed=embed)
 
+    @commands.command(
+        name="metrics",
+        description="Show internal cache and database metrics."
+    )
+    @commands.is_owner()
+    async def metrics(self, ctx):
+        prefixes = self.bot.prefixes.stats()
+        embed = discord.Embed(title="Metrics", color=Colors.default)
+        embed.add_field(
+            name="Prefix cache",
+            value=f"```Entries: {prefixes['entries']}\nHits: {prefixes['hits']}\nMisses: {prefixes['misses']}\nHit rate: {prefixes['hit_rate']:.2%}```",
+            inline=False
+        )
+        configs = self.bot.guild_configs.stats()
+        embed.add_field(
+            name="Guild config cache",
+            value=f"```Entries: {configs['entries']}\nHits: {configs['hits']}\nMisses: {configs['misses']}\nHit rate: {configs['hit_rate']:.2%}```",
+            inline=False
+        )
+        pool = self.bot.db.stats()
+        embed.add_field(
+            name="Database pool",
+            value=f"```Readers idle: {pool['idle_readers']}/{pool['readers']}\nWriter busy: {pool['writer_busy']}```",
+            inline=False
+        )
+        writes = pool['writes']
+        embed.add_field(
+            name="Write queue",
+            value=f"```Depth: {writes['depth']}\nWrites: {writes['writes']} in {writes['batches']} batches\nAvg batch: {writes['avg_batch']:.1f} (max {writes['largest_batch']})\nFailures: {writes['failures']}\nLast flush: {writes['last_flush_ms']:.1f}ms```",
+            inline=False
+        )
+        timers = self.bot.timers.stats()
+        next_in = f"{timers['next_in']:.0f}s" if timers['next_in'] is not None else "none"
+        embed.add_field(
+            name="Timers",
+            value=f"```Pending: {timers['pending']}\nNext expiry in: {next_in}\nFired: {timers['fired']}\nFailed: {timers['failed']}```",
+            inline=False
+        )
+        limiter = self.bot.message_limiter.stats()
+        embed.add_field(
+            name="Message limiter",
+            value=f"```Windows: {limiter['entries']}/{limiter['max_entries']}\nEvictions: {limiter['evictions']}\nMessages limited: {limiter['limited']}```",
+            inline=False
+        )
+        guild_stats = self.bot.guild_stats.stats()
+        role_index = self.bot.role_index.stats()
+        embed.add_field(
+            name="Member indexes",
+            value=f"```Guild stats: {guild_stats['guilds']} guilds ({guild_stats['builds']} builds)\nRole index: {role_index['guilds']} guilds, {role_index['entries']} memberships ({role_index['builds']} builds)```",
+            inline=False
+        )
+        chunker = self.bot.chunker.stats()
+        cached = sum(len(guild.members) for guild in self.bot.guilds)
+        total = sum(guild.member_count or 0 for guild in self.bot.guilds)
+        max_chunked = f"/{chunker['max_chunked']}" if chunker['max_chunked'] is not None else ""
+        embed.add_field(
+            name="Member cache",
+            value=f"```Profile: {chunker['profile']}\nMembers cached: {cached}/{total}\nMessages cached: {len(self.bot.cached_messages)}\nChunked on demand: {chunker['chunked']}{max_chunked} ({chunker['chunks']} chunks, {chunker['evictions']} evictions)\nSnapshots: {chunker['snapshots']}\nMember fetches: {chunker['fetches']}\nResident memory: {format_memory(memory_mb())}```",
+            inline=False
+        )
+        if self.bot.startup_report is not None:
+            phase_lines = "\n".join(f"{phase}: {seconds:.2f}s" for phase, seconds in self.bot.startup_report["phases"].items())
+            embed.add_field(
+                name="Startup",
+                value=f"```{phase_lines}\nTotal: {self.bot.startup_report['ready_s']:.2f}s```",
+                inline=False
+            )
+        http = self.bot.http_client.stats()
+        embed.add_field(
+            name="HTTP client",
+            value=f"```Requests: {http['requests']} ({http['failures']} failed)\nConnections: {http['new_connections']} opened, {http['reused_connections']} reused\nReuse rate: {http['reuse_rate']:.2%}\nDNS cache: {http['dns_hits']} hits, {http['dns_misses']} misses```",
+            inline=False
+        )
+        social = self.bot.get_cog("SocialMedia")
+        if social is not None:
+            posts = social.posts.stats()
+            media = social.media.stats()
+            embed.add_field(
+                name="Instagram cache",
+                value=f"```Posts: {posts['entries']}/{posts['max_entries']}, hit rate {posts['hit_rate']:.2%} ({posts['coalesced']} shared), {posts['evictions']} evicted, {posts['expired']} expired\nMedia: {media['files']} files, {media['bytes'] / 1048576:.0f}/{media['max_bytes'] / 1048576:.0f} MiB, hit rate {media['hit_rate']:.2%} ({media['coalesced']} shared), {media['evictions']} evicted```",
+                inline=False
+            )
+        components = self.bot.components.stats()
+        handler_lines = "".join(
+            f"\n{prefix}: {stats.calls} clicks, avg {stats.avg_ms:.1f}ms, {stats.failures} failed"
+            for prefix, stats in self.bot.components.handler_stats.items()
+        )
+        embed.add_field(
+            name="Components",
+            value=f"```Handlers: {components['handlers']}\nClicks: {components['calls']}\nFailures: {components['failures']}\nUnrouted: {components['unrouted']}{handler_lines}```",
+            inline=False
+        )
+        rest = self.bot.rest.stats()
+        busiest = sorted(self.bot.rest.routes.items(), key=lambda item: item[1].calls + item[1].shed, reverse=True)[:6]
+        route_lines = "".join(
+            f"\n{name}: {stats.calls} calls, {stats.queued} queued, avg wait {stats.avg_wait_ms:.0f}ms, {stats.shed} shed, {stats.coalesced} coalesced"
+            for name, stats in busiest
+        )
+        embed.add_field(
+            name="REST dispatcher",
+            value=f"```In flight: {rest['in_flight']}/{rest['concurrency']} (+{rest['critical']} critical)\nQueued: {rest['queued']}\nShed: {rest['shed']}\nCoalesced: {rest['coalesced']}{route_lines}```",
+            inline=False
+        )
+        slowest = sorted(self.bot.database.query_stats.items(), key=lambda item: item[1].total_ms, reverse=True)[:8]
+        if slowest:
+            query_lines = "\n".join(
+                f"{name}: {stats.count}x avg {stats.avg_ms:.2f}ms max {stats.max_ms:.2f}ms"
+                for name, stats in slowest
+            )
+            embed.add_field(name="Queries by total time", value=f"```{query_lines}```", inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.command(
+        name="clusters",
+        description="Show the health of every cluster and its shards."
+    )
+    @commands.is_owner()
+    async def clusters(self, ctx):
+        reports = await self.bot.cluster_health()
+        embed = discord.Embed(title="Clusters", color=Colors.default)
+        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        for cluster_id, report in sorted(reports.items(), key=lambda item: int(item[0])):
+            shard_lines = " ".join(
+                f"#{shard_id}:{latency}ms" if latency is not None else f"#{shard_id}:down"
+                for shard_id, latency in report["shards"].items()
+            )
+            last_seen = f"\nLast report: {now - report['received_at']:.0f}s ago" if "received_at" in report else ""
+            embed.add_field(
+                name=f"Cluster {cluster_id} ({'ready' if report['ready'] else 'starting'})",
+                value=f"```Guilds: {report['guilds']}\nMembers cached: {report['members_cached']}\nMemory: {format_memory(report['memory_mb'])}\nUptime: {format_timedelta(datetime.timedelta(seconds=report['uptime_s']))}{last_seen}\nShards: {shard_lines}```",
+                inline=False
+            )
+        if self.bot.ipc is not None:
+            ipc = self.bot.ipc.stats()
+            embed.set_footer(text=f"IPC {'connected' if ipc['connected'] else 'disconnected'}: {ipc['published']} published, {ipc['received']} received, {ipc['reconnects']} reconnects")
+        await ctx.send(embed=embed)
+
+
 
 
-        
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Owner(bot))
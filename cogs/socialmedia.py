@@ -1,21 +1,145 @@
 import discord
 from discord.ext import commands
-import instaloader
 import re
-import aiohttp
-import aiofiles
-import os
 import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from backend.cache import TTLCache
+from backend.http import DownloadTooLarge
+from backend.media import MediaCache
+
+WORKERS = 4  # Threads for blocking instaloader calls, shared by every guild
+GUILD_CONCURRENCY = 2  # Instagram lookups one guild can run at once
+QUEUE_TIMEOUT = 30  # Seconds to wait for a free slot in the guild
+FETCH_TIMEOUT = 30  # Seconds one lookup may take before we give up on it
+POST_TTL = 600  # Seconds post metadata is reused; like and comment counts drift slowly
+
+
+class InstaPost(NamedTuple):
+    caption: str
+    username: str
+    likes: int
+    comments: int
+    timestamp: str
+    profile_pic_url: str
+    is_video: bool
+    video_url: str
+    image_url: str
+
+
+class GuildSlots:
+    """One guild's Instagram lookup slots and how many calls are holding or waiting for one."""
+
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(GUILD_CONCURRENCY)
+        self.users = 0
+
+
+async def acquire_within(semaphore, timeout):
+    """Acquire `semaphore` or raise asyncio.TimeoutError after `timeout` seconds.
+
+    Unlike `wait_for(semaphore.acquire())` before Python 3.12, a slot granted
+    just as the timeout or a cancellation lands is never left held.
+    """
+    acquire = asyncio.ensure_future(semaphore.acquire())
+    try:
+        await asyncio.wait({acquire}, timeout=timeout)
+    except asyncio.CancelledError:
+        if acquire.done() and not acquire.cancelled():
+            semaphore.release()
+        else:
+            acquire.cancel()
+        raise
+    if not acquire.done():
+        # A cancelled acquire hands any slot it was just granted to the next waiter
+        acquire.cancel()
+        raise asyncio.TimeoutError
+    acquire.result()
+
 
 class SocialMedia(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.loader = instaloader.Instaloader()
+        self.executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="instaloader")
+        self.guild_slots = {}  # guild_id: GuildSlots, only while a lookup holds or waits for one
+        self.posts = TTLCache(max_entries=512, ttl=POST_TTL)  # shortcode: InstaPost
+        directory = os.getenv("MEDIA_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "instagram-media")
+        if bot.cluster_id is not None:
+            directory = os.path.join(directory, f"cluster-{bot.cluster_id}")
+        self.media = MediaCache(directory, max_bytes=int(os.getenv("MEDIA_CACHE_MB", "512")) * 1024 * 1024)
+        self._local = threading.local()
+        self._loaders = []
+        self._loaders_lock = threading.Lock()
+
+    async def cog_load(self):
+        await asyncio.to_thread(self.media.load)
+
+    async def cog_unload(self):
+        self.executor.shutdown(wait=False)
+        with self._loaders_lock:
+            for loader in self._loaders:
+                loader.close()
+
+    @property
+    def loader(self):
+        """This worker thread's Instaloader, built on its first Instagram request."""
+        loader = getattr(self._local, "loader", None)
+        if loader is None:
+            import instaloader  # Slow to import and most processes never serve an Instagram request
+            loader = self._local.loader = instaloader.Instaloader()
+            with self._loaders_lock:
+                self._loaders.append(loader)
+        return loader
+
+    def fetch_post(self, shortcode):
+        """Blocking: look the post up and read every field that needs a request, on a worker thread."""
+        import instaloader
+        post = instaloader.Post.from_shortcode(self.loader.context, shortcode)
+        return InstaPost(
+            caption=post.caption if post.caption else "No caption provided.",
+            username=post.owner_username,
+            likes=post.likes,
+            comments=post.comments,
+            timestamp=post.date_utc.strftime("%Y-%m-%d %H:%M:%S"),
+            profile_pic_url=post.owner_profile.profile_pic_url,
+            is_video=post.is_video,
+            video_url=post.video_url if post.is_video else None,
+            image_url=post.url,
+        )
+
+    async def run_blocking(self, guild_id, func, *args):
+        """Run `func` on the worker pool, at most GUILD_CONCURRENCY at a time per guild.
+
+        Raises asyncio.TimeoutError if no slot frees up within QUEUE_TIMEOUT or the
+        call takes longer than FETCH_TIMEOUT. A timed-out call keeps its thread
+        until instaloader returns, but the pool never grows past WORKERS. A
+        guild's slots are dropped once no call holds or waits for one.
+        """
+        slots = self.guild_slots.get(guild_id)
+        if slots is None:
+            slots = self.guild_slots[guild_id] = GuildSlots()
+        slots.users += 1
+        try:
+            await acquire_within(slots.semaphore, QUEUE_TIMEOUT)
+            try:
+                loop = asyncio.get_running_loop()
+                return await asyncio.wait_for(loop.run_in_executor(self.executor, func, *args), timeout=FETCH_TIMEOUT)
+            finally:
+                slots.semaphore.release()
+        finally:
+            slots.users -= 1
+            if not slots.users:
+                del self.guild_slots[guild_id]
 
     @commands.command(name="insta")
     async def insta(self, ctx, *, url: str):
         # Regex to extract shortcode from URL
-        match = re.search(r"instagram.com/(p|reel)/([^/]+)/", url)
+        match = re.search(r"instagram.com/(p|reel)/([\w-]+)/", url)
         if not match:
             await ctx.send("Invalid Instagram URL provided.")
             return
@@ -24,45 +148,45 @@ class SocialMedia(commands.Cog):
         retries = 3
         for attempt in range(retries):
             try:
-                post = instaloader.Post.from_shortcode(self.loader.context, shortcode)
-                caption = post.caption if post.caption else "No caption provided."
-                username = post.owner_username
-                likes = post.likes
-                comments = post.comments
-                timestamp = post.date_utc.strftime("%Y-%m-%d %H:%M:%S")
-                profile_pic_url = post.owner_profile.profile_pic_url
-
-                embed = discord.Embed(description=f"[{caption}]({url})", color=0x1DA1F2)
-                embed.set_author(name=username, icon_url=profile_pic_url)
-                embed.add_field(name="Likes", value=f"❤️ {likes}", inline=True)
-                embed.add_field(name="Comments", value=f"💬 {comments}", inline=True)
-                embed.set_footer(text=f"❤️ {likes} 💬 {comments} • {username} • Posted on {timestamp}")
+                # Everyone asking for the same post shares one lookup and one download
+                post = await self.posts.get_or_load(
+                    shortcode, lambda: self.run_blocking(ctx.guild.id if ctx.guild else None, self.fetch_post, shortcode)
+                )
+
+                embed = discord.Embed(description=f"[{post.caption}]({url})", color=0x1DA1F2)
+                embed.set_author(name=post.username, icon_url=post.profile_pic_url)
+                embed.add_field(name="Likes", value=f"❤️ {post.likes}", inline=True)
+                embed.add_field(name="Comments", value=f"💬 {post.comments}", inline=True)
+                embed.set_footer(text=f"❤️ {post.likes} 💬 {post.comments} • {post.username} • Posted on {post.timestamp}")
 
                 # Check if the post is a video
                 if post.is_video:
-                    video_url = post.video_url
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(video_url) as response:
-                            video_path = f"{shortcode}.mp4"
-                            async with aiofiles.open(video_path, 'wb') as video_file:
-                                await video_file.write(await response.read())
-                    
-                    await ctx.send(file=discord.File(video_path))
-                    os.remove(video_path)
+                    # Streamed into a private temporary file, never past what this server accepts, then kept on disk
+                    limit = ctx.guild.filesize_limit if ctx.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+                    try:
+                        path, size = await self.media.get_or_fetch(
+                            f"{shortcode}.mp4", lambda: self.bot.http_client.download(post.video_url, max_bytes=limit, timeout=60), variant=limit
+                        )
+                    except DownloadTooLarge:
+                        size = None
+                    if size is None or size > limit:
+                        embed.add_field(name="Video", value=f"Too large to upload here, [watch it on Instagram]({url})", inline=False)
+                    else:
+                        await ctx.send(file=discord.File(path, filename=f"{shortcode}.mp4"))
                 else:
-                    image_url = post.url
-                    embed.set_image(url=image_url)
+                    embed.set_image(url=post.image_url)
 
                 await ctx.send(embed=embed)
                 break  # Exit the retry loop if successful
+            except asyncio.TimeoutError:
+                # Retrying would only queue more work behind a slow or busy Instagram
+                await ctx.send("Instagram is taking too long to respond right now, try again in a moment.")
+                break
             except Exception as e:
                 if attempt < retries - 1:
                     await asyncio.sleep(2)  # Wait before retrying
                 else:
                     await ctx.send(f"Failed to retrieve the Instagram post after {retries} attempts: {str(e)}")
-            finally:
-                # Close the Instaloader context
-                self.loader.close()
 
 async def setup(bot):
-    await bot.add_cog(SocialMedia(bot))
\ No newline at end of file
+    await bot.add_cog(SocialMedia(bot))
@@ -1,11 +1,15 @@
 import discord
 from discord.ext import commands
 import datetime
-import pytz
-import aiosqlite
 from typing import Union
+from backend.cache import TTLCache
 from backend.classes import Colors, Emojis
-from discord.ui import View, Select
+from backend.dispatch import Priority
+from backend.components import ComponentRouter
+from backend.paginator import Page, slice_page
+
+HELP_TTL = 1800  # Seconds a help menu keeps the command list checked for its invoker
+
 
 def format_timedelta(td: datetime.timedelta) -> str:
     seconds = td.total_seconds()
@@ -20,14 +24,63 @@ class Utility(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.start_time = datetime.datetime.now(datetime.timezone.utc)  # Set start time when the cog is initialized
+        self.help_visible = TTLCache(max_entries=1024, ttl=HELP_TTL)  # (guild_id, user_id): {category: [command, ...]}
 
     async def cog_load(self):
-        # Other initialization code here...
-        pass
+        self.bot.paginator.register("help", self.help_page, extras=self.help_menu, per_user=True)
+        self.bot.components.register("help", self.help_jump)
 
     async def cog_unload(self):
-        # Cleanup code here...
-        pass
+        self.bot.paginator.unregister("help")
+        self.bot.components.unregister("help")
+
+    def remember_help(self, guild, user_id, visible):
+        """Keep the commands `user_id` passed the checks for, so their menu pages never rerun them."""
+        self.help_visible.put((guild.id if guild else None, user_id), visible)
+
+    def help_categories(self, guild, user_id):
+        """The invoker's categories, in page order, or None once their menu has expired."""
+        visible = self.help_visible.get((guild.id if guild else None, user_id))
+        return None if visible is None else sorted(visible)
+
+    async def help_page(self, guild, user_id, direction, cursor):
+        """Paginator source for the help menu: one category per page, only with commands the invoker can run."""
+        visible = self.help_visible.get((guild.id if guild else None, user_id))
+        if visible is None:
+            return Page("Help", ["This help menu has expired. Run `help` again to see your commands."], 0, 0, False, False)
+        categories = sorted(visible)
+        start, indexes, has_prev, has_next = slice_page(list(range(len(categories))), direction, cursor, 1)
+        if not indexes:
+            return None
+        lines = [f"**{command.name}**: {(command.description or command.help or '')[:80]}" for command in visible[categories[start]]]
+        return Page(categories[start], lines, start, start, has_prev, has_next, len(categories))
+
+    def help_menu(self, guild, user_id):
+        """A select under every help page that jumps straight to a category."""
+        options = [
+            discord.SelectOption(label=name, description="Click to see commands in this category")
+            for name in (self.help_categories(guild, user_id) or [])[:25]
+        ]
+        if not options:
+            return []
+        return [discord.ui.Select(placeholder="Choose a category to display your help command!", options=options, custom_id=ComponentRouter.custom_id("help", user_id))]
+
+    async def help_jump(self, interaction, args):
+        """ComponentRouter handler for the help category select."""
+        if not args:
+            await interaction.response.send_message("This help menu has expired. Run `help` again.", ephemeral=True)
+            return
+        if not await self.bot.paginator.check_owner(interaction, args[0]):
+            return
+        user_id = int(args[0])
+        categories = self.help_categories(interaction.guild, user_id) or []
+        category = interaction.data["values"][0]
+        if category not in categories:
+            await interaction.response.send_message("That category is no longer available. Run `help` again.", ephemeral=True)
+            return
+        index = categories.index(category)
+        page = await self.help_page(interaction.guild, user_id, "n", index - 1)
+        await self.bot.paginator.show(interaction, "help", user_id, page, index + 1)
 
     #@commands.command(name="ping", description="Check bot latency")
     #async def ping(self, ctx):
@@ -150,8 +203,9 @@ class Utility(commands.Cog):
             return
  
         try:
-            await self.bot.db.execute("INSERT OR REPLACE INTO guild_prefixes (guild_id, prefix) VALUES (?, ?)", (ctx.guild.id, prefix))
-            await self.bot.db.commit()
+            await self.bot.database.set_prefix(ctx.guild.id, prefix)
+            self.bot.prefixes.set(ctx.guild.id, prefix)
+            self.bot.publish("prefix", guild_id=ctx.guild.id, prefix=prefix)
             await ctx.send(f"Prefix set to: `{prefix}`")
         except Exception as e:
             print(f"Error setting prefix: {e}")
@@ -162,8 +216,9 @@ class Utility(commands.Cog):
     async def delete_prefix(self, ctx):
         """Delete the custom command prefix for this server."""
         try:
-            await self.bot.db.execute("DELETE FROM guild_prefixes WHERE guild_id = ?", (ctx.guild.id,))
-            await self.bot.db.commit()
+            await self.bot.database.delete_prefix(ctx.guild.id)
+            self.bot.prefixes.delete(ctx.guild.id)
+            self.bot.publish("prefix", guild_id=ctx.guild.id, prefix=None)
             embed = discord.Embed(description=f"{Emojis.check} Prefix deleted. Default prefix is restored.", color=Colors.green)
             await ctx.send(embed=embed)
         except Exception as e:
@@ -180,9 +235,7 @@ class Utility(commands.Cog):
 
     async def get_prefix(self, guild):
         """Fetch the current prefix for the guild."""
-        async with self.bot.db.execute("SELECT prefix FROM guild_prefixes WHERE guild_id = ?", (guild.id,)) as cursor:
-            prefix = await cursor.fetchone()
-            return prefix[0] if prefix else "!"  # Default prefix if not set
+        return await self.bot.get_server_prefix(guild.id if guild else None)
 
 
 
@@ -192,9 +245,6 @@ class InvalidPrefixError(commands.CommandError):
     def __init__(self):
         super().__init__("Invalid prefix provided")
 
-async def setup(bot):
-    bot.db = await aiosqlite.connect('database/database.db')  # Setup DB connection
-
 @commands.Cog.listener()
 async def on_command_error(ctx, error):
     if isinstance(error, InvalidPrefixError):
@@ -202,42 +252,24 @@ async def on_command_error(ctx, error):
         await ctx.send(embed=embed)
         
     
-class HelpSelect(Select):
-    def __init__(self, placeholder: str, options: list):
-        super().__init__(placeholder=placeholder, options=options)
-
-    async def callback(self, interaction: discord.Interaction):
-        embed = discord.Embed(title=self.values[0], description="", color=Colors.default)
-        for command in self.view.commands[self.values[0]]:
-            embed.description += f"**{command.name}**: {command.description}\n"
-        # Keep the view active by not passing view=None
-        await interaction.response.edit_message(content=None, embed=embed, view=self.view)
-
-class HelpView(View):
-    def __init__(self, commands):
-        super().__init__()
-        self.commands = commands
-        options = [
-            discord.SelectOption(label=cog, description="Click to see commands in this category")
-            for cog in commands
-        ]
-        self.add_item(HelpSelect(placeholder="Choose a category to display your help command!", options=options))
-
 class MyHelp(commands.MinimalHelpCommand):
     async def send_bot_help(self, mapping):
-        commands_by_cog = {}
-        for cog, commands in mapping.items():
-            if cog and cog.qualified_name == "Owner":  # Skip the Owner cog
+        bot = self.context.bot
+        channel = self.get_destination()
+        # Checks run once, here, for the invoker; pages are then rendered one at a time as they are opened
+        visible = {}
+        for cog, cog_commands in mapping.items():
+            if cog is None or cog.qualified_name == "Owner":
                 continue
-            filtered = await self.filter_commands(commands, sort=True)
+            filtered = await self.filter_commands(cog_commands, sort=True)
             if filtered:
-                cog_name = getattr(cog, "qualified_name", "No Category")
-                commands_by_cog[cog_name] = filtered
-
-        view = HelpView(commands_by_cog)
-        embed = discord.Embed(title="Help", description="Choose a category to display your help command!", color=Colors.default)
-        channel = self.get_destination()
-        await channel.send(embed=embed, view=view)
+                visible[cog.qualified_name] = filtered
+        bot.get_cog("Utility").remember_help(self.context.guild, self.context.author.id, visible)
+        await bot.rest.submit(
+            "help", lambda: bot.paginator.send(channel, "help", self.context.author.id, self.context.guild),
+            priority=Priority.COSMETIC, key=(channel.id, self.context.author.id),
+            guild_id=self.context.guild.id if self.context.guild else None
+        )
 
 async def setup(bot: commands.Bot):
     bot.help_command = MyHelp()
@@ -1,54 +1,229 @@
-import aiosqlite
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+from database import queries
+from database.migrate import migrate
+from database.models import JailRecord, JailSetup, MessageLimit, Timer, UnbanJob, Warn
+from database.pool import DB_PATH, DatabasePool
+from database.writer import WriteQueue, WriteResult
+
+
+class QueryStats:
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
 
 class DatabaseManager:
-    def __init__(self, *, connection: aiosqlite.Connection) -> None:
-        self.connection = connection
-
-    async def setup_database(self):
-        # Ensure the 'afk' table is created with the necessary columns
-        await self.connection.execute("""
-        CREATE TABLE IF NOT EXISTS afk (
-            guild_id INTEGER,
-            user_id INTEGER,
-            reason TEXT,
-            afk_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  # Ensure this column is included
-            PRIMARY KEY (guild_id, user_id)
-        )
-        """)
-        await self.connection.commit()
-
-    async def add_warn(self, user_id: int, server_id: int, moderator_id: int, reason: str) -> int:
+    """Data-access layer used by every cog. All SQL lives in `database.queries`."""
+
+    def __init__(self, *, pool: DatabasePool) -> None:
+        self.pool = pool
+        self.query_stats: Dict[str, QueryStats] = {}
+        self._timing_hooks: List[Callable[[str, float], None]] = []
+
+    def add_timing_hook(self, hook: Callable[[str, float], None]) -> None:
+        """Call `hook(query_name, elapsed_ms)` after every query."""
+        self._timing_hooks.append(hook)
+
+    def remove_timing_hook(self, hook: Callable[[str, float], None]) -> None:
+        self._timing_hooks.remove(hook)
+
+    def _record(self, name: str, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.query_stats.get(name)
+        if stats is None:
+            stats = self.query_stats[name] = QueryStats()
+        stats.record(elapsed_ms)
+        for hook in self._timing_hooks:
+            try:
+                hook(name, elapsed_ms)
+            except Exception as e:
+                logging.error(f"Query timing hook failed for {name}: {e}")
+
+    async def _fetchone(self, name: str, query: str, params=()):
+        started = time.perf_counter()
+        try:
+            return await self.pool.fetchone(query, params)
+        finally:
+            self._record(name, started)
+
+    async def _fetchall(self, name: str, query: str, params=()):
+        started = time.perf_counter()
+        try:
+            return await self.pool.fetchall(query, params)
+        finally:
+            self._record(name, started)
+
+    async def _execute(self, name: str, query: str, params=()) -> WriteResult:
+        started = time.perf_counter()
+        try:
+            return await self.pool.execute(query, params)
+        finally:
+            self._record(name, started)
+
+    # Prefixes
+
+    async def get_prefixes(self) -> list:
+        return await self._fetchall("all_prefixes", queries.ALL_PREFIXES)
+
+    async def get_prefix(self, guild_id: int) -> Optional[str]:
+        row = await self._fetchone("get_prefix", queries.GET_PREFIX, (guild_id,))
+        return row[0] if row else None
+
+    async def set_prefix(self, guild_id: int, prefix: str) -> None:
+        await self._execute("set_prefix", queries.SET_PREFIX, (guild_id, prefix))
+
+    async def delete_prefix(self, guild_id: int) -> None:
+        await self._execute("delete_prefix", queries.DELETE_PREFIX, (guild_id,))
+
+    # Warnings
+
+    async def add_warn(self, user_id: int, guild_id: int, moderator_id: int, reason: str) -> int:
         """
         This function will add a warn to the database.
         """
-        warn_id = await self.connection.execute_fetchval(
-            "INSERT INTO warns(user_id, server_id, moderator_id, reason) VALUES (?, ?, ?, ?) RETURNING id",
-            (user_id, server_id, moderator_id, reason)
-        )
-        await self.connection.commit()
-        return warn_id
+        result = await self._execute("add_warn", queries.ADD_WARNING, (guild_id, user_id, moderator_id, reason))
+        return result.lastrowid
 
-    async def remove_warn(self, warn_id: int, user_id: int, server_id: int) -> int:
+    async def remove_warn(self, warn_id: int, user_id: int, guild_id: int) -> int:
         """
         This function will remove a warn from the database.
         """
-        await self.connection.execute(
-            "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?",
-            (warn_id, user_id, server_id)
-        )
-        await self.connection.commit()
-        remaining_warnings = await self.connection.execute_fetchval(
-            "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?",
-            (user_id, server_id)
-        )
-        return remaining_warnings
+        await self._execute("remove_warn", queries.REMOVE_WARNING, (warn_id, guild_id, user_id))
+        row = await self._fetchone("count_warnings", queries.COUNT_WARNINGS, (guild_id, user_id))
+        return row[0]
 
-    async def get_warnings(self, user_id: int, server_id: int) -> list:
+    async def get_warnings(self, user_id: int, guild_id: int) -> List[Warn]:
         """
         This function will get all the warnings of a user.
         """
-        result = await self.connection.execute_fetchall(
-            "SELECT id, moderator_id, reason, strftime('%Y-%m-%d %H:%M:%S', created_at) as created_at FROM warns WHERE user_id=? AND server_id=?",
-            (user_id, server_id)
-        )
-        return result
+        rows = await self._fetchall("get_warnings", queries.GET_WARNINGS, (guild_id, user_id))
+        return [Warn._make(row) for row in rows]
+
+    async def get_warnings_page(self, user_id: int, guild_id: int, *, after: int = 0, before: Optional[int] = None, limit: int = 10) -> List[Warn]:
+        """
+        This function will get up to `limit` warnings after or before a warning id, oldest first.
+        """
+        if before is not None:
+            rows = await self._fetchall("get_warnings_before", queries.GET_WARNINGS_BEFORE, (guild_id, user_id, before, limit))
+            rows.reverse()
+        else:
+            rows = await self._fetchall("get_warnings_after", queries.GET_WARNINGS_AFTER, (guild_id, user_id, after, limit))
+        return [Warn._make(row) for row in rows]
+
+    async def count_warnings(self, user_id: int, guild_id: int) -> int:
+        row = await self._fetchone("count_warnings", queries.COUNT_WARNINGS, (guild_id, user_id))
+        return row[0]
+
+    async def clear_warnings(self, user_id: int, guild_id: int) -> int:
+        """
+        This function will remove every warning of a user and return how many were removed.
+        """
+        result = await self._execute("clear_warnings", queries.CLEAR_WARNINGS, (guild_id, user_id))
+        return result.rowcount
+
+    # Jail
+
+    async def get_jail_setup(self, guild_id: int) -> Optional[JailSetup]:
+        row = await self._fetchone("get_jail_setup", queries.GET_JAIL_SETUP, (guild_id,))
+        return JailSetup._make(row) if row else None
+
+    async def get_jail_setups(self) -> List[JailSetup]:
+        rows = await self._fetchall("all_jail_setups", queries.ALL_JAIL_SETUPS)
+        return [JailSetup._make(row) for row in rows]
+
+    async def add_jail_setup(self, guild_id: int, channel_id: int, role_id: int, log_channel_id: int, provisioned: bool = True) -> None:
+        await self._execute("add_jail_setup", queries.ADD_JAIL_SETUP, (channel_id, role_id, guild_id, log_channel_id, provisioned))
+
+    async def set_jail_provisioned(self, guild_id: int) -> None:
+        await self._execute("set_jail_provisioned", queries.SET_JAIL_PROVISIONED, (guild_id,))
+
+    async def delete_jail_setup(self, guild_id: int) -> None:
+        await self._execute("delete_jail_setup", queries.DELETE_JAIL_SETUP, (guild_id,))
+
+    async def get_jailed(self, guild_id: int, user_id: int) -> Optional[JailRecord]:
+        row = await self._fetchone("get_jailed", queries.GET_JAILED, (guild_id, user_id))
+        return JailRecord._make(row) if row else None
+
+    async def add_jailed(self, guild_id: int, user_id: int, roles: str) -> None:
+        await self._execute("add_jailed", queries.ADD_JAILED, (guild_id, user_id, roles))
+
+    async def remove_jailed(self, guild_id: int, user_id: int) -> None:
+        await self._execute("remove_jailed", queries.REMOVE_JAILED, (guild_id, user_id))
+
+    # Guild settings
+
+    async def get_mute_roles(self) -> list:
+        return await self._fetchall("all_mute_roles", queries.ALL_MUTE_ROLES)
+
+    async def get_mute_role(self, guild_id: int) -> Optional[int]:
+        row = await self._fetchone("get_mute_role", queries.GET_MUTE_ROLE, (guild_id,))
+        return row[0] if row else None
+
+    async def set_mute_role(self, guild_id: int, role_id: int) -> None:
+        await self._execute("set_mute_role", queries.SET_MUTE_ROLE, (guild_id, role_id))
+
+    async def get_message_limits(self, guild_id: Optional[int] = None) -> List[MessageLimit]:
+        """Return the message limits for one guild, or for all guilds."""
+        if guild_id is None:
+            rows = await self._fetchall("all_message_limits", queries.ALL_MESSAGE_LIMITS)
+        else:
+            rows = await self._fetchall("get_message_limits", queries.GET_MESSAGE_LIMITS, (guild_id,))
+        return [MessageLimit._make(row) for row in rows]
+
+    async def set_message_limit(self, guild_id: int, channel_id: int, max_messages: int, window_seconds: int = 60) -> MessageLimit:
+        await self._execute("set_message_limit", queries.SET_MESSAGE_LIMIT, (channel_id, guild_id, max_messages, window_seconds))
+        return MessageLimit(guild_id, channel_id, max_messages, window_seconds)
+
+    async def delete_message_limit(self, channel_id: int) -> None:
+        await self._execute("delete_message_limit", queries.DELETE_MESSAGE_LIMIT, (channel_id,))
+
+    # Timers
+
+    async def get_timers(self) -> List[Timer]:
+        rows = await self._fetchall("all_timers", queries.ALL_TIMERS)
+        return [Timer._make(row) for row in rows]
+
+    async def add_timer(self, action: str, guild_id: int, user_id: int, expires_at: float, payload: Optional[str] = None) -> int:
+        result = await self._execute("add_timer", queries.ADD_TIMER, (action, guild_id, user_id, expires_at, payload))
+        return result.lastrowid
+
+    async def delete_timer(self, timer_id: int) -> None:
+        await self._execute("delete_timer", queries.DELETE_TIMER, (timer_id,))
+
+    # Mass unban jobs
+
+    async def get_unban_jobs(self) -> List[UnbanJob]:
+        rows = await self._fetchall("all_unban_jobs", queries.ALL_UNBAN_JOBS)
+        return [UnbanJob._make(row) for row in rows]
+
+    async def get_unban_job(self, guild_id: int) -> Optional[UnbanJob]:
+        row = await self._fetchone("get_unban_job", queries.GET_UNBAN_JOB, (guild_id,))
+        return UnbanJob._make(row) if row else None
+
+    async def add_unban_job(self, job: UnbanJob) -> None:
+        await self._execute("add_unban_job", queries.ADD_UNBAN_JOB, tuple(job))
+
+    async def update_unban_job(self, guild_id: int, last_user_id: int, unbanned: int, failed: int) -> None:
+        await self._execute("update_unban_job", queries.UPDATE_UNBAN_JOB, (last_user_id, unbanned, failed, guild_id))
+
+    async def set_unban_job_paused(self, guild_id: int, paused: bool) -> None:
+        await self._execute("set_unban_job_paused", queries.SET_UNBAN_JOB_PAUSED, (paused, guild_id))
+
+    async def delete_unban_job(self, guild_id: int) -> None:
+        await self._execute("delete_unban_job", queries.DELETE_UNBAN_JOB, (guild_id,))
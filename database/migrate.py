@@ -0,0 +1,49 @@
+import logging
+import os
+import re
+from typing import List, NamedTuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "migrations")
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Return the migrations in `directory`, ordered by their numeric prefix."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+async def migrate(pool, directory: str = MIGRATIONS_DIR) -> int:
+    """Apply pending migrations and return the resulting schema version.
+
+    The version lives in SQLite's `user_version` header field, so an up to
+    date database costs a single pragma read at boot.
+    """
+    current = (await pool.fetchone("PRAGMA user_version"))[0]
+    pending = [migration for migration in load_migrations(directory) if migration.version > current]
+    if not pending:
+        logging.info(f"Database schema is current (version {current})")
+        return current
+
+    for migration in pending:
+        with open(migration.path, "r") as migration_file:
+            sql = migration_file.read()
+        logging.info(f"Applying migration {migration.version:04d}_{migration.name}")
+        # The script and the version bump commit together or not at all
+        await pool.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {migration.version};\nCOMMIT;")
+        current = migration.version
+    return current
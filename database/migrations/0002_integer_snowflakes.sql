@@ -0,0 +1,38 @@
+-- Store guild and user IDs as INTEGER everywhere, matching the other tables
+
+-- Table for warnings
+CREATE TABLE warnings_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO warnings_new (id, guild_id, user_id, moderator_id, reason, timestamp)
+    SELECT id, CAST(guild_id AS INTEGER), CAST(user_id AS INTEGER), CAST(moderator_id AS INTEGER), reason, timestamp
+    FROM warnings;
+DROP TABLE warnings;
+ALTER TABLE warnings_new RENAME TO warnings;
+
+-- Table for guild prefixes
+CREATE TABLE guild_prefixes_new (
+    guild_id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL
+);
+INSERT INTO guild_prefixes_new (guild_id, prefix)
+    SELECT CAST(guild_id AS INTEGER), prefix FROM guild_prefixes;
+DROP TABLE guild_prefixes;
+ALTER TABLE guild_prefixes_new RENAME TO guild_prefixes;
+
+-- Table for forced nicknames
+CREATE TABLE forced_nicknames_new (
+    guild_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    nickname TEXT,
+    PRIMARY KEY (guild_id, member_id)
+);
+INSERT INTO forced_nicknames_new (guild_id, member_id, nickname)
+    SELECT CAST(guild_id AS INTEGER), CAST(member_id AS INTEGER), nickname FROM forced_nicknames;
+DROP TABLE forced_nicknames;
+ALTER TABLE forced_nicknames_new RENAME TO forced_nicknames;
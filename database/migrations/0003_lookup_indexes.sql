@@ -0,0 +1,7 @@
+-- Composite indexes for the per-guild, per-user lookups
+
+CREATE INDEX IF NOT EXISTS idx_warnings_guild_user ON warnings (guild_id, user_id);
+
+CREATE INDEX IF NOT EXISTS idx_warns_server_user ON warns (server_id, user_id);
+
+CREATE INDEX IF NOT EXISTS idx_snipe_guild_channel ON snipe (guild_id, channel_id);
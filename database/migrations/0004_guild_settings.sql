@@ -0,0 +1,16 @@
+-- Persist settings that used to live only in memory
+
+-- Table for custom mute roles
+CREATE TABLE IF NOT EXISTS guild_mute_roles (
+    guild_id INTEGER PRIMARY KEY,
+    role_id INTEGER NOT NULL
+);
+
+-- Table for per-channel message limits
+CREATE TABLE IF NOT EXISTS message_limits (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    max_messages INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_message_limits_guild ON message_limits (guild_id);
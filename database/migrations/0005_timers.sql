@@ -0,0 +1,12 @@
+-- Durable timers for temporary bans, mutes and jails
+
+CREATE TABLE IF NOT EXISTS timers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    payload TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_timers_target ON timers (action, guild_id, user_id);
@@ -0,0 +1,3 @@
+-- Let every limited channel choose its own window length
+
+ALTER TABLE message_limits ADD COLUMN window_seconds INTEGER NOT NULL DEFAULT 60;
@@ -0,0 +1,13 @@
+-- Checkpoints for mass unban jobs so they can resume after a restart
+
+CREATE TABLE IF NOT EXISTS unban_jobs (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    moderator_id INTEGER NOT NULL,
+    reason_pattern TEXT,
+    banned_before REAL,
+    last_user_id INTEGER NOT NULL DEFAULT 0,
+    unbanned INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,3 @@
+-- Track whether setme finished applying the jail overwrites, so a rerun can finish the rest
+
+ALTER TABLE setme ADD COLUMN provisioned INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,3 @@
+-- A mass unban that stopped on an error keeps its checkpoint until a moderator resumes or cancels it
+
+ALTER TABLE unban_jobs ADD COLUMN paused INTEGER NOT NULL DEFAULT 0;
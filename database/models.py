@@ -0,0 +1,53 @@
+from typing import NamedTuple, Optional
+
+
+class Warn(NamedTuple):
+    id: int
+    guild_id: int
+    user_id: int
+    moderator_id: int
+    reason: str
+    timestamp: Optional[str]
+
+
+class JailSetup(NamedTuple):
+    channel_id: int
+    role_id: int
+    guild_id: int
+    log_channel_id: int
+    provisioned: bool = True
+
+
+class JailRecord(NamedTuple):
+    guild_id: int
+    user_id: int
+    roles: str
+
+
+class MessageLimit(NamedTuple):
+    guild_id: int
+    channel_id: int
+    max_messages: int
+    window_seconds: int
+
+
+class Timer(NamedTuple):
+    id: int
+    action: str
+    guild_id: int
+    user_id: int
+    expires_at: float
+    payload: Optional[str]
+
+
+class UnbanJob(NamedTuple):
+    guild_id: int
+    channel_id: int
+    message_id: Optional[int]
+    moderator_id: int
+    reason_pattern: Optional[str]
+    banned_before: Optional[float]
+    last_user_id: int
+    unbanned: int
+    failed: int
+    paused: bool = False
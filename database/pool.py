@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import logging
+import os
+
+import aiosqlite
+
+from database.writer import WriteQueue, WriteResult
+
+DB_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "database.db")
+
+# Applied to every connection. WAL lets readers run while the writer commits,
+# and busy_timeout turns short lock contention into a wait instead of an error.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+class DatabasePool:
+    """Shared SQLite access: a bounded pool of read connections and a single writer."""
+
+    def __init__(self, path: str = DB_PATH, *, readers: int = 4, write_window: float = 0.005) -> None:
+        self.path = path
+        self.reader_count = readers
+        self.writes = WriteQueue(self, window=write_window)
+        self._readers: asyncio.Queue = asyncio.Queue()
+        self._all_readers: list = []
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self, *, readonly: bool = False) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.path)
+        for pragma in PRAGMAS:
+            await connection.execute(pragma)
+        if readonly:
+            await connection.execute("PRAGMA query_only = ON")
+        else:
+            # Writes are group-committed, so a full fsync per batch is affordable
+            # and makes an acknowledged write survive power loss.
+            await connection.execute("PRAGMA synchronous = FULL")
+        return connection
+
+    async def open(self) -> None:
+        self._writer = await self._connect()
+        self.writes.start()
+        for _ in range(self.reader_count):
+            connection = await self._connect(readonly=True)
+            self._all_readers.append(connection)
+            self._readers.put_nowait(connection)
+        logging.info(f"Database pool opened with {self.reader_count} readers and 1 writer")
+
+    async def close(self) -> None:
+        await self.writes.close()
+        async with self._write_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+        for connection in self._all_readers:
+            await connection.close()
+        self._all_readers.clear()
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        """Borrow a read-only connection, waiting if every reader is busy."""
+        connection = await self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put_nowait(connection)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Hold the writer for several statements that must commit together."""
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    async def fetchone(self, query: str, params=()):
+        async with self.reader() as connection:
+            async with connection.execute(query, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, query: str, params=()):
+        async with self.reader() as connection:
+            async with connection.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
+    async def execute(self, query: str, params=()) -> WriteResult:
+        """Queue a single write statement and wait for the batch it joins to commit."""
+        return await self.writes.submit(query, params)
+
+    async def executemany(self, query: str, params) -> int:
+        async with self.transaction() as connection:
+            async with connection.executemany(query, params) as cursor:
+                return cursor.rowcount
+
+    async def executescript(self, script: str) -> None:
+        async with self.transaction() as connection:
+            await connection.executescript(script)
+
+    def stats(self) -> dict:
+        return {
+            "readers": self.reader_count,
+            "idle_readers": self._readers.qsize(),
+            "writer_busy": self._write_lock.locked(),
+            "writes": self.writes.stats(),
+        }
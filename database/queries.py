@@ -0,0 +1,70 @@
+# Every SQL statement the bot runs, declared once and referenced by DatabaseManager.
+
+# Prefixes
+ALL_PREFIXES = "SELECT guild_id, prefix FROM guild_prefixes"
+GET_PREFIX = "SELECT prefix FROM guild_prefixes WHERE guild_id = ?"
+SET_PREFIX = "INSERT OR REPLACE INTO guild_prefixes (guild_id, prefix) VALUES (?, ?)"
+DELETE_PREFIX = "DELETE FROM guild_prefixes WHERE guild_id = ?"
+
+# Warnings
+ADD_WARNING = "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)"
+GET_WARNINGS = (
+    "SELECT id, guild_id, user_id, moderator_id, reason, timestamp FROM warnings "
+    "WHERE guild_id = ? AND user_id = ? ORDER BY id"
+)
+GET_WARNINGS_AFTER = (
+    "SELECT id, guild_id, user_id, moderator_id, reason, timestamp FROM warnings "
+    "WHERE guild_id = ? AND user_id = ? AND id > ? ORDER BY id LIMIT ?"
+)
+GET_WARNINGS_BEFORE = (
+    "SELECT id, guild_id, user_id, moderator_id, reason, timestamp FROM warnings "
+    "WHERE guild_id = ? AND user_id = ? AND id < ? ORDER BY id DESC LIMIT ?"
+)
+COUNT_WARNINGS = "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?"
+REMOVE_WARNING = "DELETE FROM warnings WHERE id = ? AND guild_id = ? AND user_id = ?"
+CLEAR_WARNINGS = "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?"
+
+# Jail setup
+GET_JAIL_SETUP = "SELECT channel_id, role_id, guild_id, log_channel_id, provisioned FROM setme WHERE guild_id = ?"
+ADD_JAIL_SETUP = "INSERT OR REPLACE INTO setme (channel_id, role_id, guild_id, log_channel_id, provisioned) VALUES (?, ?, ?, ?, ?)"
+SET_JAIL_PROVISIONED = "UPDATE setme SET provisioned = 1 WHERE guild_id = ?"
+DELETE_JAIL_SETUP = "DELETE FROM setme WHERE guild_id = ?"
+
+# Jailed members
+GET_JAILED = "SELECT guild_id, user_id, roles FROM jail WHERE guild_id = ? AND user_id = ?"
+ADD_JAILED = "INSERT INTO jail (guild_id, user_id, roles) VALUES (?, ?, ?)"
+REMOVE_JAILED = "DELETE FROM jail WHERE guild_id = ? AND user_id = ?"
+
+# Guild settings
+ALL_JAIL_SETUPS = "SELECT channel_id, role_id, guild_id, log_channel_id, provisioned FROM setme"
+ALL_MUTE_ROLES = "SELECT guild_id, role_id FROM guild_mute_roles"
+GET_MUTE_ROLE = "SELECT role_id FROM guild_mute_roles WHERE guild_id = ?"
+SET_MUTE_ROLE = "INSERT OR REPLACE INTO guild_mute_roles (guild_id, role_id) VALUES (?, ?)"
+ALL_MESSAGE_LIMITS = "SELECT guild_id, channel_id, max_messages, window_seconds FROM message_limits"
+GET_MESSAGE_LIMITS = "SELECT guild_id, channel_id, max_messages, window_seconds FROM message_limits WHERE guild_id = ?"
+SET_MESSAGE_LIMIT = (
+    "INSERT OR REPLACE INTO message_limits (channel_id, guild_id, max_messages, window_seconds) VALUES (?, ?, ?, ?)"
+)
+DELETE_MESSAGE_LIMIT = "DELETE FROM message_limits WHERE channel_id = ?"
+
+# Timers
+ALL_TIMERS = "SELECT id, action, guild_id, user_id, expires_at, payload FROM timers"
+ADD_TIMER = "INSERT OR REPLACE INTO timers (action, guild_id, user_id, expires_at, payload) VALUES (?, ?, ?, ?, ?)"
+DELETE_TIMER = "DELETE FROM timers WHERE id = ?"
+
+# Mass unban jobs
+ALL_UNBAN_JOBS = (
+    "SELECT guild_id, channel_id, message_id, moderator_id, reason_pattern, banned_before, last_user_id, unbanned, failed, paused "
+    "FROM unban_jobs"
+)
+GET_UNBAN_JOB = (
+    "SELECT guild_id, channel_id, message_id, moderator_id, reason_pattern, banned_before, last_user_id, unbanned, failed, paused "
+    "FROM unban_jobs WHERE guild_id = ?"
+)
+ADD_UNBAN_JOB = (
+    "INSERT OR REPLACE INTO unban_jobs (guild_id, channel_id, message_id, moderator_id, reason_pattern, banned_before, last_user_id, unbanned, failed, paused) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_UNBAN_JOB = "UPDATE unban_jobs SET last_user_id = ?, unbanned = ?, failed = ? WHERE guild_id = ?"
+SET_UNBAN_JOB_PAUSED = "UPDATE unban_jobs SET paused = ? WHERE guild_id = ?"
+DELETE_UNBAN_JOB = "DELETE FROM unban_jobs WHERE guild_id = ?"
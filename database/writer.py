@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple
+
+
+class WriteResult(NamedTuple):
+    lastrowid: int
+    rowcount: int
+
+
+class WriteQueue:
+    """Write-behind queue that commits writes arriving close together as one transaction.
+
+    Every statement runs inside its own savepoint, so a failing statement only
+    fails its own caller. Callers are resolved after the batch has committed.
+    """
+
+    def __init__(self, pool, *, window: float = 0.005, max_batch: int = 256) -> None:
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = None
+        self._closed = False
+        self.writes = 0
+        self.batches = 0
+        self.failures = 0
+        self.largest_batch = 0
+        self.last_flush_ms = 0.0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="database-write-queue")
+
+    async def submit(self, query: str, params=()) -> WriteResult:
+        """Queue a write and wait until the transaction containing it has committed."""
+        if self._closed:
+            raise RuntimeError("Write queue is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((query, params, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop accepting writes and flush everything already queued."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put_nowait(None)
+        if self._task is not None:
+            await self._task
+
+    async def _run(self) -> None:
+        # The shutdown sentinel is always the last item queued, so stopping
+        # once it is seen still flushes every write submitted before close()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Give writes issued in the same burst a moment to join this transaction
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch) -> None:
+        started = time.perf_counter()
+        results = []
+        try:
+            async with self.pool.transaction() as connection:
+                await connection.execute("BEGIN")
+                for query, params, _ in batch:
+                    await connection.execute("SAVEPOINT queued_write")
+                    try:
+                        async with connection.execute(query, params) as cursor:
+                            results.append(WriteResult(cursor.lastrowid, cursor.rowcount))
+                    except Exception as e:
+                        await connection.execute("ROLLBACK TO queued_write")
+                        results.append(e)
+                    await connection.execute("RELEASE queued_write")
+        except Exception as e:
+            logging.error(f"Failed to commit batch of {len(batch)} writes: {e}")
+            results = [e] * len(batch)
+
+        self.writes += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                self.failures += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "writes": self.writes,
+            "batches": self.batches,
+            "avg_batch": self.writes / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms,
+        }
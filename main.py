@@ -1,4 +1,11 @@
-from bot import DiscordBot 
+import os
+
+from bot import DiscordBot, intents
 
 if __name__ == "__main__":
-   DiscordBot().run()
\ No newline at end of file
+   clusters = int(os.getenv("CLUSTER_COUNT", "1"))
+   if clusters > 1:
+      from backend.cluster import launch
+      launch(clusters, shard_count=int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None)
+   else:
+      DiscordBot(intents=intents).run(os.getenv("TOKEN"))